@@ -1,5 +1,6 @@
 import flet as ft
 import cli
+import log_setup  # Also sends Flet's own records to debug.log
 from datetime import date, timedelta
 
 
@@ -19,12 +20,12 @@ def main(page: ft.Page):
 
     # --- Meal Plan View ---
     def build_meal_plan_view():
-        plan_data = cli.get_meal_plan()
+        # Show next 7 days
+        start_date = date.today()
+        plan_data = cli.get_meal_plan_range(start_date, 7)
 
         days_column = ft.Column(scroll=ft.ScrollMode.AUTO, expand=True, spacing=10)
 
-        # Show next 7 days
-        start_date = date.today()
         for i in range(7):
             d = start_date + timedelta(days=i)
             d_str = d.isoformat()
@@ -57,14 +58,14 @@ def main(page: ft.Page):
         return ft.Container(content=days_column, padding=10)
 
     def build_meal_row(date_str, meal_type, items):
-        # items is a list of recipe names
+        # items is a list of MealEntry objects
         chips = []
         for idx, item in enumerate(items):
             chips.append(
                 ft.Chip(
-                    label=ft.Text(item.title()),
-                    on_delete=lambda e, d=date_str, m=meal_type, i=idx: delete_meal(
-                        d, m, i
+                    label=ft.Text(f"{item.recipe.title()} ({item.servings})"),
+                    on_delete=lambda e, d=date_str, m=meal_type, i=idx, r=item.recipe: (
+                        delete_meal(d, m, i, r)
                     ),
                 )
             )
@@ -92,8 +93,16 @@ def main(page: ft.Page):
             spacing=2,
         )
 
-    def delete_meal(date_str, meal_type, index):
-        cli.remove_from_meal_plan(date_str, meal_type.lower(), index)
+    def delete_meal(date_str, meal_type, index, recipe):
+        # Passing the shown recipe makes the removal fail instead of deleting
+        # another entry if the slot changed since it was drawn
+        if not cli.remove_from_meal_plan(
+            date_str, meal_type.lower(), index, expected_recipe=recipe
+        ):
+            page.snack_bar = ft.SnackBar(
+                ft.Text("This meal was changed elsewhere; the plan was reloaded.")
+            )
+            page.snack_bar.open = True
         refresh_all()
 
     def open_recipe_selector(date_str, meal_type):
@@ -107,20 +116,41 @@ def main(page: ft.Page):
             dlg.open = False
             refresh_all()
 
-        recipes = cli.get_all_recipes()
         recipe_list = ft.ListView(expand=1, spacing=5, padding=10)
 
-        for r_name in sorted(recipes.keys()):
-            recipe_list.controls.append(
-                ft.ListTile(
-                    title=ft.Text(r_name.title()), on_click=select_recipe, data=r_name
+        def fill_recipe_list(query=""):
+            # Fuzzy matches for a query, otherwise every recipe
+            if query.strip():
+                names = cli.find_recipes(query.strip().lower(), n=10, cutoff=0.4)
+            else:
+                names = sorted(cli.get_all_recipes().keys())
+            recipe_list.controls.clear()
+            for r_name in names:
+                recipe_list.controls.append(
+                    ft.ListTile(
+                        title=ft.Text(r_name.title()),
+                        on_click=select_recipe,
+                        data=r_name,
+                    )
                 )
-            )
+
+        def search_changed(e):
+            fill_recipe_list(e.control.value)
+            page.update()
+
+        fill_recipe_list()
 
         dlg = ft.AlertDialog(
             title=ft.Text(f"Select for {meal_type}"),
             content=ft.Container(
-                content=recipe_list,
+                content=ft.Column(
+                    [
+                        ft.TextField(
+                            label="Search", autofocus=True, on_change=search_changed
+                        ),
+                        recipe_list,
+                    ]
+                ),
                 width=400,
                 height=400,
                 border=ft.border.all(1, ft.colors.GREY_300),
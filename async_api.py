@@ -0,0 +1,74 @@
+"""
+Async version of the backend API in cli.py, for the NiceGUI app.
+Every call runs on a single worker thread, so disk and database I/O and
+shopping list aggregation never block the event loop. One thread is enough:
+the backend serializes writers anyway, and cli's in-memory indexes and caches
+are not thread-safe, so backend calls must still run one at a time.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import cli
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backend")
+
+
+async def run(func, *args, **kwargs):
+    """Runs func(*args, **kwargs) on the backend thread and returns its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def run_in_snapshot(func, *args, **kwargs):
+    """
+    Like run(), but inside cli.snapshot().
+
+    The backend calls func makes share one view of the data, and its writes
+    are saved together.
+    """
+
+    def call():
+        with cli.snapshot():
+            return func(*args, **kwargs)
+
+    return await run(call)
+
+
+def _offload(func):
+    """Returns an async version of a backend function that runs it with run()."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+
+    return wrapper
+
+
+load_data = _offload(cli.load_data)
+save_data = _offload(cli.save_data)
+
+get_all_recipes = _offload(cli.get_all_recipes)
+get_recipe = _offload(cli.get_recipe)
+find_recipes = _offload(cli.find_recipes)
+recipes_containing = _offload(cli.recipes_containing)
+add_recipe = _offload(cli.add_recipe)
+add_recipes = _offload(cli.add_recipes)
+delete_recipe = _offload(cli.delete_recipe)
+
+get_meal_plan = _offload(cli.get_meal_plan)
+get_meal_plan_range = _offload(cli.get_meal_plan_range)
+update_meal_plan = _offload(cli.update_meal_plan)
+remove_from_meal_plan = _offload(cli.remove_from_meal_plan)
+update_meal_plan_entry_servings = _offload(cli.update_meal_plan_entry_servings)
+move_meal_plan_entry = _offload(cli.move_meal_plan_entry)
+clear_meal_plan = _offload(cli.clear_meal_plan)
+apply_meal_plan_entries = _offload(cli.apply_meal_plan_entries)
+copy_meal_plan_range = _offload(cli.copy_meal_plan_range)
+repeat_meal_plan_week = _offload(cli.repeat_meal_plan_week)
+clear_meal_plan_range = _offload(cli.clear_meal_plan_range)
+
+generate_shopping_list_data = _offload(cli.generate_shopping_list_data)
@@ -0,0 +1,486 @@
+"""
+Benchmarks for the backend API in cli.py.
+Generates synthetic recipes.json, ingredients.json and multi-year meal plans
+at several sizes, times the backend entry points against each storage backend,
+and writes a report to 'bench_output.txt'.
+
+    python bench.py                                 # 1k and 10k recipes
+    python bench.py --sizes 1000 10000 100000
+    python bench.py --save-baseline baseline.json   # record a baseline
+    python bench.py --baseline baseline.json        # exit 1 on regressions
+    python bench.py --sizes                         # only the startup check
+
+Every (size, backend) pair runs in a fresh interpreter pointed at the
+generated data with MEALPLANNER_DATA_DIR, so the cold timings include reading
+the files and nothing is cached from an earlier run. The data is generated
+from a fixed seed, so runs on the same machine are comparable.
+
+Every run also checks the CLI's cold start. Importing cli, or running a
+scripted command, may take at most STARTUP_BUDGET_MS longer than starting a
+bare interpreter, timed alongside, so a slow machine or Python build doesn't
+count against cli. And, as reported by `python -X importtime`, importing cli
+must not load any of STARTUP_FORBIDDEN (GUI toolkits, or modules that only
+some commands need). Either failure makes the run exit with status 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+BACKENDS = ["json", "sqlite"]
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_YEARS = 3
+DEFAULT_REPEAT = 5
+
+# The generated plans start here, and the benchmarks read and edit inside them
+PLAN_START = date(2024, 1, 1)
+
+REPORT_FILE = "bench_output.txt"
+
+# Wall time allowed on top of starting a bare interpreter, and modules that
+# importing cli must not load
+STARTUP_BUDGET_MS = 100
+STARTUP_FORBIDDEN = ["nicegui", "flet", "numpy", "difflib", "sqlite3", "logging"]
+STARTUP_RUNS = 5
+
+# The bare interpreter start the budget is measured from
+STARTUP_BARE = ["-c", "pass"]
+
+# Commands whose wall time, less STARTUP_BARE's, must stay in budget
+STARTUP_COMMANDS = {
+    "import cli": ["-c", "import cli"],
+    "cli.py search": ["cli.py", "search", "rice"],
+}
+
+# A case is a regression when its median is this much slower than the
+# baseline, both relatively and in milliseconds (to ignore noise on fast calls)
+DEFAULT_TOLERANCE = 0.25
+REGRESSION_FLOOR_MS = 0.5
+
+# Word lists the synthetic names are built from
+_ADJECTIVES = (
+    "smoky spicy creamy crispy roasted grilled braised lemony garlic herbed "
+    "sweet sour tangy golden rustic quick slow-cooked charred fresh baked"
+).split()
+_FOODS = (
+    "chicken beef pork tofu salmon shrimp lentil chickpea mushroom potato "
+    "tomato pepper onion carrot spinach rice noodle bean egg cheese apple pear "
+    "almond coconut ginger basil cumin paprika oat barley"
+).split()
+_DISHES = (
+    "stew curry salad soup pie bake stir-fry tacos risotto pasta bowl skewers "
+    "casserole wraps fritters"
+).split()
+_UNITS = ["g", "kg", "ml", "l", "tsp", "tbsp", "cup", "pcs", "clove", "pinch"]
+_MEALS = ["breakfast", "lunch", "dinner", "snack"]
+
+
+# --- Synthetic data ---
+
+
+def make_recipes(count, rng):
+    """
+    Builds count recipes over a vocabulary of about count / 10 ingredients.
+
+    Returns:
+        tuple: ({name: recipe}, sorted list of ingredient names).
+    """
+    vocabulary = sorted(
+        {
+            f"{rng.choice(_ADJECTIVES)} {rng.choice(_FOODS)} {i}"
+            for i in range(max(200, count // 10))
+        }
+    )
+    recipes = {}
+    for i in range(count):
+        name = (
+            f"{rng.choice(_ADJECTIVES)} {rng.choice(_FOODS)} "
+            f"{rng.choice(_DISHES)} {i}"
+        )
+        recipes[name] = {
+            "ingredients": [
+                {
+                    "item": item,
+                    "quantity": rng.choice([0.5, 1, 2, 3, 100, 250]),
+                    "unit": rng.choice(_UNITS),
+                }
+                for item in rng.sample(vocabulary, rng.randint(4, 12))
+            ],
+            "instructions": [
+                f"Step {step}: {rng.choice(_ADJECTIVES)} {rng.choice(_FOODS)}."
+                for step in range(1, rng.randint(3, 8) + 1)
+            ],
+            "servings": rng.randint(1, 6),
+        }
+    return recipes, vocabulary
+
+
+def make_plan(names, years, rng):
+    """
+    Builds a plan of 2-4 meals a day for the given number of years.
+
+    Returns:
+        dict: {month: {date: {meal_type: [MealEntry]}}}.
+    """
+    from models import MealEntry
+
+    months = defaultdict(dict)
+    for offset in range(365 * years):
+        day = PLAN_START + timedelta(days=offset)
+        months[day.isoformat()[:7]][day.isoformat()] = {
+            meal: [
+                MealEntry(rng.choice(names), rng.randint(1, 4))
+                for _ in range(rng.randint(1, 2))
+            ]
+            for meal in rng.sample(_MEALS, rng.randint(2, 4))
+        }
+    return months
+
+
+def generate_dataset(directory, recipe_count, years, seed=0):
+    """Writes a synthetic data set to directory in the JSON backend's format."""
+    import json_store
+    import storage
+
+    rng = random.Random(seed)
+    recipes, vocabulary = make_recipes(recipe_count, rng)
+    months = make_plan(sorted(recipes), years, rng)
+
+    base_dir, storage.BASE_DIR = storage.BASE_DIR, Path(directory)
+    try:
+        storage.save_data("recipes.json", recipes)
+        storage.save_data("ingredients.json", vocabulary)
+        plan = json_store.MonthlyPlan(months=months)
+        storage.save_data("meal_plan.json", plan.to_manifest())
+    finally:
+        storage.BASE_DIR = base_dir
+        storage.invalidate_cache()
+
+
+# --- Timing (runs in the worker process) ---
+
+
+def run_cases(repeat):
+    """
+    Times the backend entry points against the data in MEALPLANNER_DATA_DIR.
+
+    Returns:
+        dict: {case: [seconds, ...]}.
+    """
+    import cli
+
+    samples = defaultdict(list)
+
+    def timed(case, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        samples[case].append(time.perf_counter() - started)
+        return result
+
+    recipes = timed("get_all_recipes (cold)", cli.get_all_recipes)
+    names = sorted(recipes)
+    timed("get_meal_plan_range 7d (cold)", cli.get_meal_plan_range, PLAN_START, 7)
+
+    rng = random.Random(1)
+    sample = names[0]
+    for i in range(repeat):
+        name = rng.choice(names)
+        # A typo, so the fuzzy search can't stop at an exact match
+        query = name[:-2] + name[-1:]
+        # A different week each time, so no shopping list is served from cache
+        start = PLAN_START + timedelta(weeks=4 * (i + 1))
+        day = start.isoformat()
+        next_day = (start + timedelta(days=1)).isoformat()
+
+        timed("get_all_recipes", cli.get_all_recipes)
+        timed("find_recipes", cli.find_recipes, query)
+        timed("recipes_containing", cli.recipes_containing, name.split()[1])
+        timed("get_meal_plan_range 7d", cli.get_meal_plan_range, start, 7)
+        timed(
+            "generate_shopping_list_data 7d",
+            cli.generate_shopping_list_data,
+            start,
+            7,
+        )
+        timed(
+            "generate_shopping_list_data 28d",
+            cli.generate_shopping_list_data,
+            start + timedelta(days=7),
+            28,
+        )
+
+        timed("update_meal_plan", cli.update_meal_plan, day, "snack", name)
+        index = len(cli.get_meal_plan_range(start, 1)[day]["snack"]) - 1
+        timed(
+            "move_meal_plan_entry",
+            cli.move_meal_plan_entry,
+            day,
+            "snack",
+            index,
+            next_day,
+            "snack",
+            name,
+        )
+        moved_to = cli.get_meal_plan_range(start + timedelta(days=1), 1)
+        index = len(moved_to[next_day]["snack"]) - 1
+        timed(
+            "remove_from_meal_plan",
+            cli.remove_from_meal_plan,
+            next_day,
+            "snack",
+            index,
+            name,
+        )
+
+        recipe = recipes[sample]
+        timed(
+            "add_recipe",
+            cli.add_recipe,
+            f"bench recipe {i}",
+            recipe["ingredients"],
+            recipe["instructions"],
+            recipe["servings"],
+        )
+    return dict(samples)
+
+
+def _worker_main(repeat):
+    """Entry point of a worker process: prints run_cases() as JSON."""
+    results = run_cases(repeat)
+    json.dump(results, sys.stdout)
+
+
+def run_worker(directory, backend, repeat=0):
+    """
+    Runs run_cases() in a fresh interpreter against directory.
+
+    With repeat=0 it only loads the data, which makes the SQLite backend
+    build its database and the JSON backend its snapshots, and returns None.
+    """
+    env = dict(os.environ, MEALPLANNER_DATA_DIR=str(directory))
+    env["MEALPLANNER_BACKEND"] = backend
+    completed = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--worker", str(repeat)],
+        cwd=directory,  # Keeps the worker's debug.log with its data
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout) if repeat else None
+
+
+def measure_startup(runs=STARTUP_RUNS):
+    """
+    Times STARTUP_COMMANDS and STARTUP_BARE in fresh interpreters, and checks
+    what cli loads.
+
+    Returns:
+        tuple: ({case: [seconds, ...]}, list of problems found).
+    """
+    directory = Path(__file__).resolve().parent
+    # An empty data directory, so the import can't depend on existing data
+    env = dict(os.environ, MEALPLANNER_DATA_DIR=tempfile.mkdtemp())
+    env.pop("MEALPLANNER_BACKEND", None)
+    cases = {"python": STARTUP_BARE, **STARTUP_COMMANDS}
+    samples = defaultdict(list)
+    modules = set()
+    try:
+        for _ in range(runs):
+            for case, arguments in cases.items():
+                started = time.perf_counter()
+                subprocess.run(
+                    [sys.executable, *arguments],
+                    cwd=directory,
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    check=True,
+                )
+                samples[f"startup / {case} (wall)"].append(
+                    time.perf_counter() - started
+                )
+
+            completed = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", "import cli"],
+                cwd=directory,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            # Lines are "import time: self [us] | cumulative | package"
+            for line in completed.stderr.splitlines()[1:]:
+                _, cumulative, name = line.split("|")
+                modules.add(name.strip())
+                if name.strip() == "cli":
+                    samples["startup / import cli"].append(int(cumulative) / 1e6)
+    finally:
+        shutil.rmtree(env["MEALPLANNER_DATA_DIR"], ignore_errors=True)
+
+    problems = [
+        f"importing cli loads {name}"
+        for name in STARTUP_FORBIDDEN
+        if any(module.split(".")[0] == name for module in modules)
+    ]
+    bare = statistics.median(samples["startup / python (wall)"]) * 1000
+    for case in STARTUP_COMMANDS:
+        wall = statistics.median(samples[f"startup / {case} (wall)"]) * 1000
+        if wall - bare > STARTUP_BUDGET_MS:
+            problems.append(
+                f"{case} takes {wall - bare:.0f} ms more than a bare interpreter"
+                f" ({bare:.0f} ms), over the {STARTUP_BUDGET_MS} ms budget"
+            )
+    return dict(samples), problems
+
+
+# --- Report ---
+
+
+def summarize(samples):
+    """Returns {case: {"median_ms", "min_ms", "runs"}} for run_cases() samples."""
+    return {
+        case: {
+            "median_ms": statistics.median(times) * 1000,
+            "min_ms": min(times) * 1000,
+            "runs": len(times),
+        }
+        for case, times in samples.items()
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Finds the cases that got slower than the baseline.
+
+    Both arguments are {key: {"median_ms", ...}} as saved by --save-baseline.
+
+    Returns:
+        list: (key, baseline ms, current ms) for every regression.
+    """
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        old, new = before["median_ms"], result["median_ms"]
+        if new > old * (1 + tolerance) and new - old > REGRESSION_FLOOR_MS:
+            regressions.append((key, old, new))
+    return regressions
+
+
+def format_report(results, baseline=None):
+    """Formats the results as a table, with the change from the baseline if any."""
+    lines = [
+        f"Meal Planner benchmarks, {time.strftime('%Y-%m-%d %H:%M')}, "
+        f"Python {platform.python_version()} on {platform.platform()}",
+        "",
+        f"{'case':<56} {'median ms':>10} {'min ms':>10}"
+        f" {'baseline':>10} {'change':>8}",
+    ]
+    for key, result in results.items():
+        row = f"{key:<56} {result['median_ms']:>10.2f} {result['min_ms']:>10.2f}"
+        before = (baseline or {}).get(key)
+        if before is not None and before["median_ms"]:
+            change = result["median_ms"] / before["median_ms"] - 1
+            row += f" {before['median_ms']:>10.2f} {change:>+8.0%}"
+        lines.append(row)
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Meal Planner backend."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="*", default=DEFAULT_SIZES, help="recipe counts"
+    )
+    parser.add_argument(
+        "--years", type=int, default=DEFAULT_YEARS, help="length of the meal plans"
+    )
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="runs of each warm case"
+    )
+    parser.add_argument(
+        "--save-baseline", metavar="FILE", help="save the results as a baseline"
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        help="compare against a baseline and exit 1 on regressions",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--keep", action="store_true", help="keep the generated data")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        if args.worker:
+            _worker_main(args.worker)
+        else:
+            import cli
+
+            cli.get_all_recipes()
+        return 0
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print("Timing the CLI's startup...")
+    samples, problems = measure_startup()
+    results = summarize(samples)
+    root = Path(tempfile.mkdtemp(prefix="mealplanner-bench-"))
+    try:
+        for size in args.sizes:
+            print(f"Generating {size} recipes and a {args.years} year plan...")
+            for backend in args.backends:
+                directory = root / f"{size}-{backend}"
+                directory.mkdir()
+                generate_dataset(directory, size, args.years)
+                run_worker(directory, backend)  # Builds the database and snapshots
+                print(f"Timing the {backend} backend...")
+                samples = run_worker(directory, backend, args.repeat)
+                for case, result in summarize(samples).items():
+                    results[f"{size} recipes / {backend} / {case}"] = result
+    finally:
+        if args.keep:
+            print(f"Data kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = format_report(results, baseline)
+    if problems:
+        report += "\n" + "".join(f"STARTUP {problem}\n" for problem in problems)
+    Path(REPORT_FILE).write_text(report, encoding="utf-8")
+    print(report)
+    print(f"Saved to {REPORT_FILE}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Saved the baseline to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old:.2f} ms -> {new:.2f} ms")
+        if regressions:
+            return 1
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,184 +2,560 @@
 Command Line Interface (CLI) and Backend Logic for the Meal Planner application.
 This module handles data persistence (JSON), core business logic (shopping list generation),
 and provides a terminal-based user interface.
+Run with arguments for the scriptable commands instead (python cli.py --help).
 """
 
-from difflib import get_close_matches
 from logger import logger
 
+import contextvars
+import events
+import metrics
 import os
 import sys
 import math  # Added for pagination calculations
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import date, timedelta
 
 
-import json
-from pathlib import Path
-
-
 def osclear():
     """Clears the terminal screen based on the operating system."""
     os.system("cls" if os.name == "nt" else "clear")
 
 
-BASE_DIR = Path(__file__).resolve().parent
+class _Lazy:
+    """
+    Stands in for an object that is only built, importing its module, on first use.
+
+    A scripted command imports just the storage and indexes it works with,
+    and `python cli.py --help` imports none of them.
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._target = None
+
+    def __getattr__(self, name):
+        if self._target is None:
+            self._target = self._build()
+        return getattr(self._target, name)
+
+
+# --- Backend API ---
+# Storage is delegated to a backend module: JSON files by default, or SQLite
+# when the environment variable MEALPLANNER_BACKEND is set to "sqlite".
+
+STORAGE_BACKEND = os.environ.get("MEALPLANNER_BACKEND", "json").lower()
+
+
+def _import_backend():
+    if STORAGE_BACKEND == "sqlite":
+        import sqlite_store as backend
+    else:
+        import json_store as backend
+    return backend
+
+
+def _new_ingredient_index():
+    from ingredient_index import IngredientIndex
+
+    return IngredientIndex()
+
+
+def _new_recipe_index():
+    from recipe_index import RecipeIndex
+
+    return RecipeIndex(_ingredient_index)
+
+
+def _new_search_index():
+    from search_index import RecipeSearchIndex
+
+    return RecipeSearchIndex()
+
+
+backend = _Lazy(_import_backend)
+
+# Meal types counted in shopping lists, in display order
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+
+# Canonical ingredient names and compiled recipes for shopping list
+# aggregation, kept in step with storage
+_ingredient_index = _Lazy(_new_ingredient_index)
+_recipe_index = _Lazy(_new_recipe_index)
+
+# Fuzzy search over recipe names
+_search_index = _Lazy(_new_search_index)
+
+# Materialized shopping lists for recently requested date ranges, keyed by
+# (start_date, days). Meal plan edits patch them in place.
+_shopping_windows = OrderedDict()
+MAX_SHOPPING_WINDOWS = 8
+
+# The open snapshot() of the current thread or task, if any: its cached reads
+# and the events waiting for it to be saved
+_snapshot = contextvars.ContextVar("snapshot", default=None)
+
+
+@contextmanager
+def snapshot():
+    """
+    Shares one view of the stored data between the backend calls in a block.
+
+    Inside the block each kind of read (all recipes, all ingredients, a meal
+    plan range) hits storage once and is then reused until a write changes
+    it. Writes are saved together when the block exits (in one transaction
+    with SQLite) and their change events are sent only then. If the block
+    raises, its meal plan writes are discarded. Nested blocks join the
+    outermost one.
+
+    The block holds the storage lock, so keep it short and don't await in it.
+    """
+    if _snapshot.get() is not None:
+        yield
+        return
+    view = {"reads": {}, "events": []}
+    token = _snapshot.set(view)
+    try:
+        with backend.batch():
+            yield
+    except BaseException:
+        # The shopping lists may have been patched with discarded edits
+        _shopping_windows.clear()
+        raise
+    finally:
+        _snapshot.reset(token)
+    for kind, details in view["events"]:
+        events.emit(kind, **details)
+
+
+def _read(key, load):
+    """Returns load(), reusing the result for key within a snapshot()."""
+    view = _snapshot.get()
+    if view is None:
+        return load()
+    reads = view["reads"]
+    if key not in reads:
+        reads[key] = load()
+    return reads[key]
+
+
+def _forget(*kinds):
+    """Drops a snapshot's reads of the given kinds after a write changed them."""
+    view = _snapshot.get()
+    if view is not None:
+        reads = view["reads"]
+        view["reads"] = {key: val for key, val in reads.items() if key[0] not in kinds}
+
+
+def _changed(kind, **details):
+    """
+    Emits a change event, and forgets the snapshot reads it made stale.
+
+    Within a snapshot() the event waits until the writes are saved.
+    """
+    if kind == events.MEAL_PLAN_CHANGED:
+        _forget("plan")
+    else:
+        _forget("recipes", "ingredients")
+    view = _snapshot.get()
+    if view is None:
+        events.emit(kind, **details)
+    else:
+        view["events"].append((kind, details))
 
 
 def load_data(file_path):
-    """Load JSON data from the given file path."""
-    file_path = BASE_DIR / file_path
-    if not file_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Loads a data file (see storage.load_data)."""
+    import storage
 
+    return storage.load_data(file_path)
 
-def save_data(file_path, data):
-    """Save JSON data to the given file path."""
-    file_path = BASE_DIR / file_path
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
 
+def save_data(file_path, data):
+    """Saves a data file (see storage.save_data)."""
+    import storage
 
-# --- Backend API ---
+    storage.save_data(file_path, data)
 
 
 def get_all_recipes():
-    """Retrieves all recipes from 'recipes.json'."""
-    try:
-        return load_data("recipes.json")
-    except FileNotFoundError:
-        return {}
+    """Retrieves all recipes as a {name: recipe} dict."""
+    return _read(("recipes",), backend.get_all_recipes)
+
+
+def get_recipe(name):
+    """Retrieves one recipe, or None if there is no recipe with that name."""
+    return get_all_recipes().get(name)
 
 
 def get_all_ingredients():
-    """Retrieves the list of known ingredients from 'ingredients.json'."""
-    try:
-        return load_data("ingredients.json")
-    except FileNotFoundError:
-        return []
+    """Retrieves the list of known ingredients."""
+    return _read(("ingredients",), backend.get_all_ingredients)
 
 
+@metrics.timed
 def save_ingredients(names):
     """Saves new ingredients to the database if they don't exist."""
-    ingredients = get_all_ingredients()
-    updated = False
-    existing_set = set(ingredients)
-    for name in names:
-        if name not in existing_set:
-            ingredients.append(name)
-            existing_set.add(name)
-            updated = True
-    if updated:
-        ingredients.sort()
-        save_data("ingredients.json", ingredients)
+    names = list(names)
+    backend.save_ingredients(names)
+    _ingredient_index.added(names)
+    _forget("ingredients")
 
 
+@metrics.timed
 def add_recipe(name, ingredients, instructions, servings=1):
     """Adds a new recipe or updates an existing one, then saves to storage."""
-    recipes = get_all_recipes()
-    recipes[name] = {
-        "ingredients": ingredients,
-        "instructions": instructions,
-        "servings": servings,
-    }
-    save_data("recipes.json", recipes)
-    # Ensure ingredients are in the ingredients database
-    save_ingredients([ing["item"] for ing in ingredients])
+    backend.add_recipe(name, ingredients, instructions, servings)
+    _ingredient_index.added(ing["item"] for ing in ingredients)
+    _search_index.add(name)
+    _recipe_index.discard(name)
+    _shopping_windows.clear()
+    _changed(events.RECIPE_SAVED, name=name)
+
 
+@metrics.timed
+def add_recipes(recipes):
+    """
+    Adds or updates many recipes at once (see recipe_io for bulk imports).
 
+    Args:
+        recipes (dict): {name: {"ingredients", "instructions", "servings"}}.
+    """
+    if not recipes:
+        return
+    backend.add_recipes(recipes)
+    _ingredient_index.added(
+        ing["item"] for recipe in recipes.values() for ing in recipe["ingredients"]
+    )
+    for name in recipes:
+        _search_index.add(name)
+        _recipe_index.discard(name)
+    _shopping_windows.clear()
+    _changed(events.RECIPES_SAVED, names=sorted(recipes))
+
+
+@metrics.timed
 def delete_recipe(name):
     """Deletes a recipe by name if it exists."""
-    recipes = get_all_recipes()
-    if name in recipes:
-        del recipes[name]
-        save_data("recipes.json", recipes)
-        return True
-    return False
+    deleted = backend.delete_recipe(name)
+    _search_index.discard(name)
+    _recipe_index.discard(name)
+    _shopping_windows.clear()
+    if deleted:
+        _changed(events.RECIPE_DELETED, name=name)
+    return deleted
+
+
+def find_recipes(query, n=10, cutoff=0.4):
+    """
+    Fuzzy-matches a query against the recipe names.
+
+    Returns the same names as difflib.get_close_matches(query, names, n, cutoff).
+
+    Returns:
+        list: Up to n recipe names, best match first.
+    """
+    _search_index.sync(get_all_recipes())
+    return _search_index.search(query, n, cutoff)
+
+
+def recipes_containing(text=""):
+    """Returns the recipe names containing text (ignoring case), sorted."""
+    _search_index.sync(get_all_recipes())
+    return _search_index.containing(text)
 
 
 def get_meal_plan():
-    """Retrieves the current meal plan structure from 'meal_plan.json'."""
-    try:
-        return load_data("meal_plan.json")
-    except FileNotFoundError:
-        return {}
+    """Retrieves the whole meal plan as {date: {meal_type: [MealEntry]}}."""
+    return _read(("plan",), backend.get_meal_plan)
+
+
+def get_meal_plan_range(start_date, days):
+    """
+    Retrieves the planned days in a date range.
+
+    Args:
+        start_date (date): The first day.
+        days (int): Number of days.
+
+    Returns:
+        dict: {date: {meal_type: [MealEntry]}} for the planned days only.
+    """
+    return _read(
+        ("plan", start_date, days),
+        lambda: backend.get_meal_plan_range(start_date, days),
+    )
+
 
+def _slot_entries(date_str, meal_type=None, index=None):
+    """
+    Snapshots meal plan entries before an edit, for shopping list deltas.
+
+    Returns:
+        list: (date_str, meal_type, recipe_name, planned_servings) tuples for
+        one entry, one meal, or (with meal_type None) a whole day.
+    """
+    if not _shopping_windows:
+        return []
+    day_plan = get_meal_plan_range(date.fromisoformat(date_str), 1).get(date_str, {})
+    meals = list(day_plan) if meal_type is None else [meal_type]
+    snapshot = []
+    for m in meals:
+        items = day_plan.get(m, [])
+        if index is not None:
+            try:
+                items = [items[index]]
+            except IndexError:
+                return []
+        for entry in items:
+            snapshot.append((date_str, m, entry.recipe, float(entry.servings)))
+    return snapshot
 
+
+def _patch_shopping_windows(version, removed=(), added=()):
+    """
+    Applies one meal plan edit to the materialized shopping lists.
+
+    version is the meal plan version read before the edit. A window is only
+    patched if it matched that version and nothing outside this edit changed
+    the plan meanwhile; otherwise it is dropped and rebuilt on next use.
+    """
+    if not _shopping_windows:
+        return
+    new_version = backend.get_meal_plan_version()
+    for key, window in list(_shopping_windows.items()):
+        if (
+            window.version != version
+            or new_version[0] != version[0]
+            or window.source is not _recipe_index.source
+        ):
+            del _shopping_windows[key]
+            continue
+        for entries, sign in ((removed, -1), (added, 1)):
+            for date_str, meal_type, recipe_name, planned_servings in entries:
+                if meal_type in MEAL_TYPES and window.covers(date_str):
+                    pair = _recipe_index.scale(recipe_name, planned_servings)
+                    if pair is not None:
+                        window.add(pair, sign)
+        window.version = new_version
+
+
+@metrics.timed
 def update_meal_plan(date_str, meal_type, recipe_name, servings=1):
     """Adds a recipe to the meal plan for a specific date and meal type."""
-    plan = get_meal_plan()
-    if date_str not in plan:
-        plan[date_str] = {}
-    if meal_type not in plan[date_str]:
-        plan[date_str][meal_type] = []
+    version = backend.get_meal_plan_version()
+    backend.update_meal_plan(date_str, meal_type, recipe_name, servings)
+    _patch_shopping_windows(
+        version, added=[(date_str, meal_type, recipe_name, float(servings))]
+    )
+    _changed(events.MEAL_PLAN_CHANGED, dates=[date_str])
+
 
-    plan[date_str][meal_type].append({"recipe": recipe_name, "servings": servings})
-    save_data("meal_plan.json", plan)
+# The index-based edits below accept an optional expected_recipe. When given,
+# the edit only happens if the entry at that index is still that recipe, so a
+# client working from an outdated view can't change the wrong entry. They
+# return True if the plan was changed.
 
 
-def remove_from_meal_plan(date_str, meal_type, index):
+@metrics.timed
+def remove_from_meal_plan(date_str, meal_type, index, expected_recipe=None):
     """Removes a recipe from the meal plan at the specified index."""
-    plan = get_meal_plan()
-    if date_str in plan and meal_type in plan[date_str]:
-        try:
-            plan[date_str][meal_type].pop(index)
-            # Cleanup
-            if not plan[date_str][meal_type]:
-                del plan[date_str][meal_type]
-            if not plan[date_str]:
-                del plan[date_str]
-            save_data("meal_plan.json", plan)
-        except IndexError:
-            pass
+    version = backend.get_meal_plan_version()
+    removed = _slot_entries(date_str, meal_type, index)
+    changed = backend.remove_from_meal_plan(
+        date_str, meal_type, index, expected_recipe
+    )
+    _patch_shopping_windows(version, removed=removed if changed else ())
+    if changed:
+        _changed(events.MEAL_PLAN_CHANGED, dates=[date_str])
+    return changed
+
+
+@metrics.timed
+def update_meal_plan_entry_servings(
+    date_str, meal_type, index, servings, expected_recipe=None
+):
+    """Updates the servings for a specific meal plan entry."""
+    version = backend.get_meal_plan_version()
+    removed = _slot_entries(date_str, meal_type, index)
+    changed = backend.update_meal_plan_entry_servings(
+        date_str, meal_type, index, servings, expected_recipe
+    )
+    if changed:
+        added = [(*removed[0][:3], float(servings))] if removed else []
+        _patch_shopping_windows(version, removed, added)
+        _changed(events.MEAL_PLAN_CHANGED, dates=[date_str])
+    else:
+        _patch_shopping_windows(version)
+    return changed
+
+
+@metrics.timed
+def move_meal_plan_entry(
+    src_date, src_meal, src_index, dest_date, dest_meal, expected_recipe=None
+):
+    """Moves a meal plan entry from one slot to another."""
+    version = backend.get_meal_plan_version()
+    removed = _slot_entries(src_date, src_meal, src_index)
+    moved = backend.move_meal_plan_entry(
+        src_date, src_meal, src_index, dest_date, dest_meal, expected_recipe
+    )
+    if moved:
+        added = [(dest_date, dest_meal, *entry[2:]) for entry in removed]
+        _patch_shopping_windows(version, removed, added)
+        _changed(events.MEAL_PLAN_CHANGED, dates=[src_date, dest_date])
+    else:
+        _patch_shopping_windows(version)
+    return moved
+
+
+@metrics.timed
+def clear_meal_plan(date_str, meal_type=None):
+    """Clears a whole day, or a single meal of that day, from the meal plan."""
+    version = backend.get_meal_plan_version()
+    removed = _slot_entries(date_str, meal_type)
+    cleared = backend.clear_meal_plan(date_str, meal_type)
+    _patch_shopping_windows(version, removed=removed if cleared else ())
+    if cleared:
+        _changed(events.MEAL_PLAN_CHANGED, dates=[date_str])
+    return cleared
+
+
+# --- Bulk meal plan edits ---
+# Each one is saved as a single backend write: one journal record with the
+# JSON backend, one transaction with SQLite. Shopping lists for the affected
+# dates are rebuilt on next use.
+
+
+def _apply_edits(edits):
+    """Applies meal plan edit records in one backend write and emits the change."""
+    if not edits:
+        return False
+    changed = backend.apply_meal_plan_edits(edits)
+    if changed:
+        dates = sorted({edit["date"] for edit in edits})
+        _changed(events.MEAL_PLAN_CHANGED, dates=dates)
+    return changed
+
+
+def _add_edit(date_str, meal_type, recipe_name, servings):
+    return {
+        "op": "add",
+        "date": date_str,
+        "meal": meal_type,
+        "entry": {"recipe": recipe_name, "servings": servings},
+    }
 
 
-def update_meal_plan_entry_servings(date_str, meal_type, index, servings):
-    """Updates the servings for a specific meal plan entry."""
-    plan = get_meal_plan()
-    if date_str in plan and meal_type in plan[date_str]:
-        try:
-            entry = plan[date_str][meal_type][index]
-            if isinstance(entry, dict):
-                entry["servings"] = servings
-            else:
-                plan[date_str][meal_type][index] = {
-                    "recipe": entry,
-                    "servings": servings,
-                }
-            save_data("meal_plan.json", plan)
-        except IndexError:
-            pass
+def _copy_edits(source, src_start, dest_start, days, replace):
+    """
+    Edit records copying days onto dest_start.
 
-def move_meal_plan_entry(src_date, src_meal, src_index, dest_date, dest_meal):
-    """Moves a meal plan entry from one slot to another."""
-    plan = get_meal_plan()
-    if src_date in plan and src_meal in plan[src_date]:
-        try:
-            entry = plan[src_date][src_meal].pop(src_index)
-            # Cleanup
-            if not plan[src_date][src_meal]:
-                del plan[src_date][src_meal]
-            if not plan[src_date]:
-                del plan[src_date]
-            
-            if dest_date not in plan:
-                plan[dest_date] = {}
-            if dest_meal not in plan[dest_date]:
-                plan[dest_date][dest_meal] = []
-            
-            plan[dest_date][dest_meal].append(entry)
-            save_data("meal_plan.json", plan)
-            return True
-        except IndexError:
-            pass
-    return False
+    source is the plan read with get_meal_plan_range(src_start, days).
+    """
+    edits = []
+    for i in range(days):
+        dest_str = (dest_start + timedelta(days=i)).isoformat()
+        if replace:
+            edits.append({"op": "clear", "date": dest_str, "meal": None})
+        day_plan = source.get((src_start + timedelta(days=i)).isoformat(), {})
+        for meal_type, items in day_plan.items():
+            edits += [
+                _add_edit(dest_str, meal_type, entry.recipe, entry.servings)
+                for entry in items
+            ]
+    return edits
+
+
+@metrics.timed
+def apply_meal_plan_entries(entries):
+    """
+    Adds many entries to the meal plan at once.
 
+    Args:
+        entries: (date_str, meal_type, recipe_name, servings) tuples.
+
+    Returns:
+        bool: True if the plan changed.
+    """
+    return _apply_edits([_add_edit(*entry) for entry in entries])
+
+
+@metrics.timed
+def copy_meal_plan_range(src_start, dest_start, days, replace=False):
+    """
+    Copies the meals planned over a date range to another range.
 
+    Args:
+        src_start (date): First day to copy.
+        dest_start (date): Day the first copied day lands on.
+        days (int): Number of days to copy.
+        replace (bool): Clear the destination days first instead of adding
+            to what is planned there.
+
+    Returns:
+        bool: True if the plan changed.
+    """
+    source = get_meal_plan_range(src_start, days)
+    return _apply_edits(_copy_edits(source, src_start, dest_start, days, replace))
+
+
+@metrics.timed
+def repeat_meal_plan_week(week_start, times, replace=False):
+    """
+    Repeats the week starting on week_start over the following weeks.
+
+    Args:
+        week_start (date): First day of the template week.
+        times (int): Number of weeks to fill after the template.
+        replace (bool): Clear those weeks first instead of adding to them.
+
+    Returns:
+        bool: True if the plan changed.
+    """
+    source = get_meal_plan_range(week_start, 7)
+    edits = []
+    for n in range(1, times + 1):
+        dest_start = week_start + timedelta(weeks=n)
+        edits += _copy_edits(source, week_start, dest_start, 7, replace)
+    return _apply_edits(edits)
+
+
+@metrics.timed
+def clear_meal_plan_range(start_date, days):
+    """
+    Clears every meal planned over a date range.
+
+    Returns:
+        bool: True if anything was removed.
+    """
+    planned = get_meal_plan_range(start_date, days)
+    return _apply_edits(
+        [{"op": "clear", "date": d_str, "meal": None} for d_str in sorted(planned)]
+    )
+
+
+def _planned_entries(meal_plan, start_date, days):
+    """Yields (recipe_name, planned_servings) for every entry in the date range."""
+    for i in range(days):
+        d_str = (start_date + timedelta(days=i)).isoformat()
+        day_plan = meal_plan.get(d_str)
+        if not day_plan:
+            continue
+        for meal_type in MEAL_TYPES:
+            for entry in day_plan.get(meal_type, ()):
+                yield entry.recipe, float(entry.servings)
+
+
+@metrics.timed
 def generate_shopping_list_data(start_date, days):
     """
     Calculates the total ingredients needed for the meal plan over a date range.
 
+    The result for a range is materialized and kept up to date by the meal
+    plan edit functions, so asking again for the same range is cheap.
+
     Args:
         start_date (date): The starting date.
         days (int): Number of days to look ahead.
@@ -187,52 +563,36 @@ def generate_shopping_list_data(start_date, days):
     Returns:
         dict: A dictionary of ingredients and their aggregated quantities/units.
     """
-    meal_plan = get_meal_plan()
-    recipes_data = get_all_recipes()
-    shopping_list = {}
-
-    for i in range(days):
-        d = start_date + timedelta(days=i)
-        d_str = d.isoformat()
-
-        if d_str in meal_plan:
-            day_plan = meal_plan[d_str]
-            for meal_type in ["breakfast", "lunch", "dinner", "snack"]:
-                if meal_type in day_plan:
-                    for entry in day_plan[meal_type]:
-                        if isinstance(entry, dict):
-                            recipe_name = entry["recipe"]
-                            planned_servings = float(entry.get("servings", 1))
-                        else:
-                            recipe_name = entry
-                            planned_servings = None
-
-                        if recipe_name in recipes_data:
-                            r_data = recipes_data[recipe_name]
-                            base_servings = float(r_data.get("servings", 1))
-                            if planned_servings is None:
-                                planned_servings = base_servings
-
-                            scaling = (
-                                planned_servings / base_servings
-                                if base_servings
-                                else 1.0
-                            )
-                            ing_list = r_data.get("ingredients", [])
-                            for ing in ing_list:
-                                name = ing["item"].lower()
-                                try:
-                                    qty = float(ing["quantity"]) * scaling
-                                except (ValueError, TypeError):
-                                    qty = 0.0
-                                unit = ing["unit"].lower()
-
-                                if name not in shopping_list:
-                                    shopping_list[name] = {}
-                                if unit not in shopping_list[name]:
-                                    shopping_list[name][unit] = 0.0
-                                shopping_list[name][unit] += qty
-    return shopping_list
+    from recipe_index import ShoppingWindow
+
+    _ingredient_index.sync(get_all_ingredients())
+    _recipe_index.sync(get_all_recipes())
+    version = backend.get_meal_plan_version()
+    key = (start_date, days)
+    window = _shopping_windows.get(key)
+    if (
+        window is None
+        or window.version != version
+        or window.source is not _recipe_index.source
+    ):
+        meal_plan = backend.get_meal_plan_range(start_date, days)
+        counts = {}
+        totals = _recipe_index.aggregate(
+            _planned_entries(meal_plan, start_date, days), counts
+        )
+        window = ShoppingWindow(
+            start_date.isoformat(),
+            (start_date + timedelta(days=days - 1)).isoformat(),
+            _recipe_index.source,
+            version,
+            totals,
+            counts,
+        )
+        _shopping_windows[key] = window
+        if len(_shopping_windows) > MAX_SHOPPING_WINDOWS:
+            _shopping_windows.popitem(last=False)
+    _shopping_windows.move_to_end(key)
+    return _recipe_index.to_shopping_list(window.totals)
 
 
 # --- CLI ---
@@ -335,7 +695,7 @@ def search_recipes():
     current_page = 1
 
     while True:
-        data = load_data("recipes.json")
+        data = get_all_recipes()
         all_recipes = sorted(list(data.keys()))
         total_recipes = len(all_recipes)
         page_size = 10
@@ -391,9 +751,6 @@ def search_recipes():
 def search_recipe_by_name():
     """Finds recipes by name using fuzzy matching and allows selection."""
     while True:
-        data = load_data("recipes.json")
-        all_recipes = list(data.keys())
-
         osclear()
         print("Search Recipe")
         print("-" * 30)
@@ -403,7 +760,7 @@ def search_recipe_by_name():
             return
 
         # Get 10 closest matches
-        matches = get_close_matches(query, all_recipes, n=10, cutoff=0.4)
+        matches = find_recipes(query, n=10, cutoff=0.4)
 
         if not matches:
             print(f"No matches found for '{query}'.")
@@ -521,7 +878,7 @@ def view_recipe(recipe_name):
     """Displays the details (ingredients, instructions) of a specific recipe."""
     osclear()
     while True:
-        data = load_data("recipes.json")
+        data = get_all_recipes()
         if recipe_name not in data:
             print("Recipe not found (it may have been deleted).")
             input("Press Enter to return...")
@@ -574,7 +931,7 @@ def get_ingredients_from_user(recipe_name, ingredients=None):
     if ingredients is None:
         ingredients = []
 
-    available_ingredients = load_data("ingredients.json")
+    available_ingredients = get_all_ingredients()
 
     while True:
         osclear()
@@ -655,6 +1012,8 @@ def get_ingredients_from_user(recipe_name, ingredients=None):
             selected_ingredient = search_query
         else:
             # Fuzzy match
+            from difflib import get_close_matches
+
             matches = get_close_matches(
                 search_query, available_ingredients, n=5, cutoff=0.6
             )
@@ -802,16 +1161,22 @@ def create_new_ingredient():
             return None
 
         # Check if it actually exists now (in case they typed it wrong before)
-        data = load_data("ingredients.json")
+        data = get_all_ingredients()
         if name in data:
             print(f"'{name}' already exists!")
             input("Press Enter...")
             return name
 
+        # Offer an existing spelling of the same ingredient
+        _ingredient_index.sync(data)
+        variants = _ingredient_index.variants(name)
+        if variants:
+            print(f"Similar ingredients: {', '.join(variants)}")
+            if input(f"Use '{variants[0]}' instead? (y/n): ").lower() == "y":
+                return variants[0]
+
         if input(f"Save '{name}' to database? (y/n): ").lower() == "y":
-            data.append(name)
-            data.sort()
-            save_data("ingredients.json", data)
+            save_ingredients([name])
             print("Ingredient saved.")
             return name
 
@@ -834,14 +1199,10 @@ def recipe_is_unique(recipe_name: str):
         True if no similar recipe exists.
         List[str] of similar recipe names if duplicates found.
     """
-    data = load_data("recipes.json")  # dict: {recipe_name: {...}}
-
     # normalize input once
     recipe_name = recipe_name.lower().strip()
 
-    existing_recipes = list(data.keys())
-
-    matches = get_close_matches(recipe_name, existing_recipes, n=3, cutoff=0.6)
+    matches = find_recipes(recipe_name, n=3, cutoff=0.6)
 
     if matches:
         logger.info(f"found these matches: {matches}")
@@ -862,10 +1223,7 @@ def view_meal_plan():
         days_to_show = 7
 
     while True:
-        try:
-            meal_plan = load_data("meal_plan.json")
-        except FileNotFoundError:
-            meal_plan = {}
+        meal_plan = get_meal_plan_range(current_date, days_to_show)
 
         osclear()
         print(
@@ -886,14 +1244,9 @@ def view_meal_plan():
             for meal_type in ["breakfast", "lunch", "dinner", "snack"]:
                 items = day_plan.get(meal_type, [])
                 if items:
-                    display_items = []
-                    for x in items:
-                        if isinstance(x, dict):
-                            display_items.append(
-                                f"{x['recipe'].title()} ({x['servings']})"
-                            )
-                        else:
-                            display_items.append(x.title())
+                    display_items = [
+                        f"{x.recipe.title()} ({x.servings})" for x in items
+                    ]
                     items_str = ", ".join(display_items)
                     print(f"   {meal_type.title()}: {items_str}")
                     meals_found = True
@@ -906,6 +1259,7 @@ def view_meal_plan():
         print("n - Next Page")
         print("p - Previous Page")
         print("t - Jump to Today")
+        print("m - Copy, repeat or clear many days")
         print("b - Back")
         print(f"Select a day number (1-{days_to_show}) to edit.")
 
@@ -917,6 +1271,8 @@ def view_meal_plan():
             current_date -= timedelta(days=days_to_show)
         elif choice == "t":
             current_date = date.today()
+        elif choice == "m":
+            bulk_edit_meal_plan(current_date, days_to_show)
         elif choice == "b":
             return
         elif choice.isdigit():
@@ -929,17 +1285,69 @@ def view_meal_plan():
             input_invalid()
 
 
+def input_date(prompt, default):
+    """Asks for a YYYY-MM-DD date; an empty answer gives default, a bad one None."""
+    answer = input(f"{prompt} (default {default}): ").strip()
+    if not answer:
+        return default
+    try:
+        return date.fromisoformat(answer)
+    except ValueError:
+        input_invalid()
+        return None
+
+
+def bulk_edit_meal_plan(start_date, days):
+    """Menu for copying, repeating or clearing many days of the plan at once."""
+    end_date = start_date + timedelta(days=days - 1)
+    osclear()
+    print("--- Bulk Edit ---")
+    print(f"1 - Copy {start_date} - {end_date} to other dates")
+    print("2 - Repeat a week over the following weeks")
+    print(f"3 - Clear {start_date} - {end_date}")
+    print("b - Back")
+    choice = input("> ").lower().strip()
+
+    if choice == "1":
+        dest_start = input_date("First day to copy to", end_date + timedelta(days=1))
+        if dest_start is None:
+            return
+        replace = input("Replace the meals planned there? (y/n): ").lower() == "y"
+        copy_meal_plan_range(start_date, dest_start, days, replace)
+        print(f"Copied {days} days to {dest_start}.")
+    elif choice == "2":
+        week_start = input_date("First day of the week to repeat", start_date)
+        if week_start is None:
+            return
+        try:
+            times = int(input("Number of weeks to fill: "))
+        except ValueError:
+            input_invalid()
+            return
+        replace = input("Replace the meals planned there? (y/n): ").lower() == "y"
+        repeat_meal_plan_week(week_start, times, replace)
+        print(f"Repeated the week of {week_start} {times} times.")
+    elif choice == "3":
+        if input(f"Clear every meal from {start_date} to {end_date}? (y/n): ") != "y":
+            return
+        if clear_meal_plan_range(start_date, days):
+            print("Cleared.")
+        else:
+            print("Nothing to clear.")
+    elif choice == "b":
+        return
+    else:
+        input_invalid()
+        return
+    input("Press Enter...")
+
+
 def edit_day(day_date):
     """Interactive menu to modify the meal plan for a specific day."""
     d_str = day_date.isoformat()
 
     while True:
-        try:
-            meal_plan = load_data("meal_plan.json")
-        except FileNotFoundError:
-            meal_plan = {}
-
-        day_plan = meal_plan.get(d_str, {})
+        day_plan = get_meal_plan_range(day_date, 1).get(d_str, {})
 
         osclear()
         print(f"Editing Plan for {day_date.strftime('%A, %Y-%m-%d')}")
@@ -949,12 +1357,7 @@ def edit_day(day_date):
 
         for m in meal_types:
             items = day_plan.get(m, [])
-            display_items = []
-            for x in items:
-                if isinstance(x, dict):
-                    display_items.append(f"{x['recipe'].title()} ({x['servings']})")
-                else:
-                    display_items.append(x.title())
+            display_items = [f"{x.recipe.title()} ({x.servings})" for x in items]
             print(
                 f"{m.title()}: {', '.join(display_items) if display_items else '(None)'}"
             )
@@ -977,7 +1380,7 @@ def edit_day(day_date):
             m_type = meal_types[int(choice) - 1]
             recipe = select_recipe()
             if recipe:
-                r_data = load_data("recipes.json").get(recipe, {})
+                r_data = get_all_recipes().get(recipe, {})
                 base = r_data.get("servings", 1)
                 try:
                     s_val = float(input(f"Servings to make (default {base}): ") or base)
@@ -985,9 +1388,7 @@ def edit_day(day_date):
                     s_val = base
                 update_meal_plan(d_str, m_type, recipe, s_val)
         elif choice == "5":
-            if d_str in meal_plan:
-                del meal_plan[d_str]
-                save_data("meal_plan.json", meal_plan)
+            if clear_meal_plan(d_str):
                 print("Cleared day.")
         elif choice == "6":
             print("\nSelect meal to clear:")
@@ -998,11 +1399,7 @@ def edit_day(day_date):
             sub = input("> ").strip()
             if sub in ["1", "2", "3", "4"]:
                 m_type = meal_types[int(sub) - 1]
-                if d_str in meal_plan and m_type in meal_plan[d_str]:
-                    del meal_plan[d_str][m_type]
-                    if not meal_plan[d_str]:  # Clean up empty day
-                        del meal_plan[d_str]
-                    save_data("meal_plan.json", meal_plan)
+                if clear_meal_plan(d_str, m_type):
                     print(f"Cleared {m_type}.")
                 else:
                     print("Nothing to clear.")
@@ -1016,7 +1413,7 @@ def select_recipe():
     current_page = 1
 
     while True:
-        data = load_data("recipes.json")
+        data = get_all_recipes()
         all_recipes = sorted(list(data.keys()))
         total_recipes = len(all_recipes)
         page_size = 10
@@ -1068,9 +1465,6 @@ def select_recipe():
 def select_recipe_by_name(initial_query=None):
     """Fuzzy search helper for selecting a recipe by name."""
     while True:
-        data = load_data("recipes.json")
-        all_recipes = list(data.keys())
-
         if initial_query:
             query = initial_query
             initial_query = None
@@ -1083,7 +1477,7 @@ def select_recipe_by_name(initial_query=None):
         if query == "b":
             return None
 
-        matches = get_close_matches(query, all_recipes, n=10, cutoff=0.4)
+        matches = find_recipes(query, n=10, cutoff=0.4)
 
         if not matches:
             print(f"No matches found for '{query}'.")
@@ -1152,6 +1546,353 @@ def user_settings():
             input_invalid()
 
 
+# --- Scriptable commands ---
+# `python cli.py <command> ...` runs one command and prints its result as JSON;
+# without arguments the interactive menu starts. `python cli.py batch FILE`
+# runs one command per line of FILE (or stdin for "-") in a single process,
+# sharing one view of the data and saving the changes together.
+
+
+class CommandError(Exception):
+    """A command that failed, e.g. because it names an unknown recipe."""
+
+
+class UsageError(CommandError):
+    """A command line that doesn't parse."""
+
+
+def _date_arg(value):
+    """argparse type for YYYY-MM-DD dates."""
+    import argparse
+
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid date: {value!r} (expected YYYY-MM-DD)"
+        ) from None
+
+
+def _require_recipe(name):
+    if get_recipe(name) is None:
+        raise CommandError(f"unknown recipe: {name!r}")
+
+
+def _plan_show(args):
+    plan = get_meal_plan_range(args.start, args.days)
+    return {
+        date_str: {
+            meal_type: [entry.to_json() for entry in items]
+            for meal_type, items in day_plan.items()
+        }
+        for date_str, day_plan in sorted(plan.items())
+    }
+
+
+def _plan_add(args):
+    _require_recipe(args.recipe)
+    date_str = args.date.isoformat()
+    update_meal_plan(date_str, args.meal, args.recipe, args.servings)
+    return {
+        "date": date_str,
+        "meal": args.meal,
+        "recipe": args.recipe,
+        "servings": args.servings,
+    }
+
+
+def _plan_move(args):
+    src, dest = args.src_date.isoformat(), args.dest_date.isoformat()
+    if not move_meal_plan_entry(
+        src, args.src_meal, args.index, dest, args.dest_meal, args.expect
+    ):
+        raise CommandError(f"no matching entry {args.index} in {src} {args.src_meal}")
+    return {"src": [src, args.src_meal, args.index], "dest": [dest, args.dest_meal]}
+
+
+def _plan_remove(args):
+    date_str = args.date.isoformat()
+    if not remove_from_meal_plan(date_str, args.meal, args.index, args.expect):
+        raise CommandError(f"no matching entry {args.index} in {date_str} {args.meal}")
+    return {"date": date_str, "meal": args.meal, "index": args.index}
+
+
+def _plan_clear(args):
+    date_str = args.date.isoformat()
+    return {"date": date_str, "cleared": clear_meal_plan(date_str, args.meal)}
+
+
+def _shopping_list(args):
+    shopping_list = generate_shopping_list_data(args.start, args.days)
+    if args.format == "json":
+        return {item: shopping_list[item] for item in sorted(shopping_list)}
+    # Same lines as the interactive shopping list
+    lines = []
+    for item in sorted(shopping_list):
+        parts = [
+            f"{f'{qty:.2f}'.rstrip('0').rstrip('.')} {unit}"
+            for unit, qty in shopping_list[item].items()
+        ]
+        lines.append(f"[ ] {item.title()}: {', '.join(parts)}")
+    return "\n".join(lines)
+
+
+def _recipe_show(args):
+    recipe = get_recipe(args.name)
+    if recipe is None:
+        raise CommandError(f"unknown recipe: {args.name!r}")
+    return {"name": args.name, **recipe}
+
+
+def _recipe_list(args):
+    return recipes_containing(args.contains)
+
+
+def _recipe_import(args):
+    import recipe_io
+
+    count, errors = recipe_io.import_recipes(args.path, args.format)
+    return {"imported": count, "errors": errors}
+
+
+def _recipe_export(args):
+    import recipe_io
+
+    return {"exported": recipe_io.export_recipes(args.path, args.format)}
+
+
+def _search(args):
+    return find_recipes(args.query, n=args.limit, cutoff=args.cutoff)
+
+
+def _batch(args):
+    # command_line() runs batches itself; this only stops them from nesting
+    raise CommandError("batch files can't contain batch commands")
+
+
+def _terminal_columns():
+    """Returns the terminal width the way shutil.get_terminal_size() finds it."""
+    try:
+        columns = int(os.environ["COLUMNS"])
+    except (KeyError, ValueError):
+        columns = 0
+    if columns <= 0:
+        try:
+            columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            columns = 0
+    return columns or 80
+
+
+def _build_parser():
+    """Builds the argparse parser of the scriptable commands."""
+    import argparse
+
+    class Formatter(argparse.HelpFormatter):
+        # Given a width, argparse doesn't import shutil (and the compression
+        # modules it loads) just to ask for the terminal's
+        def __init__(self, prog, **kwargs):
+            kwargs.setdefault("width", _terminal_columns() - 2)
+            super().__init__(prog, **kwargs)
+
+    class Parser(argparse.ArgumentParser):
+        def __init__(self, *args, **kwargs):
+            # Subcommand parsers are built by add_parser() with these defaults too
+            kwargs.setdefault("formatter_class", Formatter)
+            super().__init__(*args, **kwargs)
+
+        # Raise instead of exiting, so a bad line in a batch only fails itself
+        def error(self, message):
+            raise UsageError(message)
+
+    parser = Parser(
+        prog="cli.py",
+        description="Meal Planner commands. Run without arguments for the menu.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser("plan", help="show or edit the meal plan")
+    plan_commands = plan.add_subparsers(dest="action", required=True)
+    show = plan_commands.add_parser("show", help="print the planned days")
+    show.add_argument("--start", type=_date_arg, default=date.today())
+    show.add_argument("--days", type=int, default=7)
+    show.set_defaults(func=_plan_show)
+    add = plan_commands.add_parser("add", help="add a recipe to a meal")
+    add.add_argument("date", type=_date_arg)
+    add.add_argument("meal", choices=MEAL_TYPES)
+    add.add_argument("recipe")
+    add.add_argument("--servings", type=float, default=1)
+    add.set_defaults(func=_plan_add)
+    move = plan_commands.add_parser("move", help="move an entry to another meal")
+    move.add_argument("src_date", type=_date_arg)
+    move.add_argument("src_meal", choices=MEAL_TYPES)
+    move.add_argument("index", type=int, help="position in the meal, from 0")
+    move.add_argument("dest_date", type=_date_arg)
+    move.add_argument("dest_meal", choices=MEAL_TYPES)
+    move.add_argument("--expect", metavar="RECIPE", help="fail unless it is RECIPE")
+    move.set_defaults(func=_plan_move)
+    remove = plan_commands.add_parser("remove", help="remove an entry from a meal")
+    remove.add_argument("date", type=_date_arg)
+    remove.add_argument("meal", choices=MEAL_TYPES)
+    remove.add_argument("index", type=int, help="position in the meal, from 0")
+    remove.add_argument("--expect", metavar="RECIPE", help="fail unless it is RECIPE")
+    remove.set_defaults(func=_plan_remove)
+    clear = plan_commands.add_parser("clear", help="clear a day or one of its meals")
+    clear.add_argument("date", type=_date_arg)
+    clear.add_argument("meal", nargs="?", choices=MEAL_TYPES)
+    clear.set_defaults(func=_plan_clear)
+
+    shopping = commands.add_parser("shopping-list", help="print a shopping list")
+    shopping.add_argument("--start", type=_date_arg, default=date.today())
+    shopping.add_argument("--days", type=int, default=7)
+    shopping.add_argument("--format", choices=["json", "text"], default="json")
+    shopping.set_defaults(func=_shopping_list)
+
+    recipe = commands.add_parser("recipe", help="show, list, import or export recipes")
+    recipe_commands = recipe.add_subparsers(dest="action", required=True)
+    details = recipe_commands.add_parser("show", help="print one recipe")
+    details.add_argument("name")
+    details.set_defaults(func=_recipe_show)
+    listing = recipe_commands.add_parser("list", help="print the recipe names")
+    listing.add_argument("--contains", default="", help="only names containing this")
+    listing.set_defaults(func=_recipe_list)
+    for action, func, help_text in [
+        ("import", _recipe_import, "import a .jsonl or .csv file"),
+        ("export", _recipe_export, "export to a .jsonl or .csv file"),
+    ]:
+        transfer = recipe_commands.add_parser(action, help=help_text)
+        transfer.add_argument("path")
+        transfer.add_argument("--format", choices=["jsonl", "csv"])
+        transfer.set_defaults(func=func)
+
+    search = commands.add_parser("search", help="fuzzy search the recipe names")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=10)
+    search.add_argument("--cutoff", type=float, default=0.4)
+    search.set_defaults(func=_search)
+
+    batch = commands.add_parser(
+        "batch", help="run one command per line of a file ('-' for stdin)"
+    )
+    batch.add_argument("file")
+    batch.add_argument(
+        "--stop-on-error", action="store_true", help="skip the rest after a failure"
+    )
+    batch.set_defaults(func=_batch)
+    return parser
+
+
+def run_command(argv, parser=None):
+    """
+    Runs one scriptable command.
+
+    Args:
+        argv (list): The command's arguments, e.g. ["plan", "add", ...].
+        parser: A parser from _build_parser(), to reuse across commands.
+
+    Returns:
+        The command's result: JSON-serializable data, or text.
+
+    Raises:
+        UsageError: If the arguments are invalid.
+        CommandError: If the command fails.
+    """
+    args = (parser or _build_parser()).parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, LookupError, OSError) as e:
+        raise CommandError(str(e)) from e
+
+
+def run_batch(lines, stop_on_error=False):
+    """
+    Runs one command per line inside a single snapshot().
+
+    All lines are read before the snapshot starts, so its storage lock isn't
+    held while waiting on the input. Blank lines and lines starting with '#'
+    are skipped.
+
+    Returns:
+        list: Each command's outcome, {"line", "command", "ok", "result" or
+        "error"}. They are only returned once the changes are saved.
+    """
+    import io
+    import shlex
+    from contextlib import redirect_stdout
+
+    lines = list(lines)
+    parser = _build_parser()
+    outcomes = []
+    with snapshot():
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            outcome = {"line": line_no, "command": line}
+            # argparse prints --help to stdout and exits; that becomes the
+            # line's error instead of ending the batch
+            text = io.StringIO()
+            try:
+                argv = shlex.split(line)
+                with redirect_stdout(text):
+                    outcome.update(ok=True, result=run_command(argv, parser))
+            except (CommandError, ValueError) as e:  # shlex raises ValueError
+                outcome.update(ok=False, error=str(e))
+            except SystemExit as e:
+                message = text.getvalue().strip() or f"exited with status {e.code}"
+                outcome.update(ok=False, error=message)
+            outcomes.append(outcome)
+            if stop_on_error and not outcome["ok"]:
+                break
+    return outcomes
+
+
+def command_line(argv):
+    """
+    Entry point for `python cli.py <command> ...`.
+
+    Prints the result to stdout (JSON, or text for shopping-list --format
+    text) and errors to stderr.
+
+    Returns:
+        int: The exit status: 0 on success, 1 if a command failed, 2 for
+        invalid arguments.
+    """
+    import json
+
+    parser = _build_parser()
+    if argv[0] == "batch":
+        try:
+            args = parser.parse_args(argv)
+            lines = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+        except (UsageError, OSError) as e:
+            print(f"cli.py: error: {e}", file=sys.stderr)
+            return 2
+        try:
+            outcomes = run_batch(lines, args.stop_on_error)
+        except Exception as e:
+            # Nothing was saved, so no line is reported as done
+            print(f"cli.py: error: batch not saved: {e}", file=sys.stderr)
+            return 1
+        finally:
+            # Only close a file opened here; stdin may still be read afterwards
+            if lines is not sys.stdin:
+                lines.close()
+        for outcome in outcomes:
+            print(json.dumps(outcome))
+        return 0 if all(outcome["ok"] for outcome in outcomes) else 1
+
+    try:
+        result = run_command(argv, parser)
+    except CommandError as e:
+        print(f"cli.py: error: {e}", file=sys.stderr)
+        return 2 if isinstance(e, UsageError) else 1
+    print(result if isinstance(result, str) else json.dumps(result, indent=4))
+    return 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(command_line(sys.argv[1:]))
     osclear()
     main()
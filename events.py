@@ -0,0 +1,60 @@
+"""
+Change notifications for the Meal Planner application.
+The backend API in cli.py emits an event after every change it makes to the
+stored data, so open views (e.g. other browser sessions of the GUI) can update
+just the parts that changed instead of polling for the whole state.
+
+Events are dicts with a "kind" key plus details:
+
+    {"kind": RECIPE_SAVED, "name": ...}
+    {"kind": RECIPES_SAVED, "names": [...]}  (a bulk import)
+    {"kind": RECIPE_DELETED, "name": ...}
+    {"kind": MEAL_PLAN_CHANGED, "dates": [date_str, ...]}
+"""
+
+import threading
+
+from logger import logger
+
+RECIPE_SAVED = "recipe_saved"
+RECIPES_SAVED = "recipes_saved"
+RECIPE_DELETED = "recipe_deleted"
+MEAL_PLAN_CHANGED = "meal_plan_changed"
+
+_listeners = []
+_lock = threading.Lock()
+
+
+def subscribe(listener):
+    """
+    Registers a function to be called with every event.
+
+    Listeners are called in the thread that made the change, so ones that
+    touch a UI must hand the event over to that UI's own thread or loop.
+
+    Returns:
+        function: Call it to unsubscribe the listener.
+    """
+    with _lock:
+        _listeners.append(listener)
+    return lambda: unsubscribe(listener)
+
+
+def unsubscribe(listener):
+    """Removes a listener; does nothing if it isn't subscribed."""
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def emit(kind, **details):
+    """Sends an event to every listener."""
+    event = {"kind": kind, **details}
+    with _lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception:
+            # A broken view must not undo or block the change itself
+            logger.exception(f"Event listener failed for {kind}")
@@ -1,20 +1,25 @@
 """
 Main GUI module for the Meal Planner application using NiceGUI.
 Handles the layout, navigation, and rendering of different tabs (Meal Plan, Recipes, Shopping List, Settings).
+Handlers reach the backend through async_api, so storage I/O never blocks the event loop.
 """
 
-from nicegui import ui
+from fastapi.responses import PlainTextResponse
+from nicegui import app, background_tasks, ui
 import json
-from pathlib import Path
 from datetime import date, timedelta
+import async_api
 import cli
-import difflib
+import events
+import log_setup  # Also sends NiceGUI's own records to debug.log
+import metrics
 import asyncio
 
 
 # --- State ---
-# Global state dictionary to hold runtime configuration and current view context.
-state = {"current_date": date.today(), "view_days": 7}
+# Global state dictionary to hold runtime configuration. Each page keeps its
+# own view of the plan (see main_page), starting from these defaults.
+state = {"view_days": 7}
 
 # --- Load Initial Settings ---
 # Attempts to load user preferences from 'settings.json'.
@@ -26,19 +31,67 @@ except FileNotFoundError:
 # Apply loaded settings to the global state
 state["view_days"] = settings.get("days_to_view", 7)
 
+# Recipe cards added to the Recipes tab per "Show more"
+RECIPES_PAGE_SIZE = 60
+# Seconds the recipe search waits for typing to pause
+SEARCH_DEBOUNCE = 0.25
+
 # --- Logic ---
 
 
+def slot_key(items):
+    """Returns a comparable snapshot of a meal slot's entries."""
+    return tuple((entry.recipe, entry.servings) for entry in items)
+
+
+def subscribe_client(listener):
+    """
+    Calls listener with every data change event while the current page is open.
+
+    Events can come from any session or thread, so they are handed over to
+    this page's event loop and handled in its client's context; listener may
+    be a coroutine function. The subscription ends when the browser
+    disconnects.
+    """
+    client = ui.context.client
+    loop = asyncio.get_running_loop()
+
+    async def handle(event):
+        with client:
+            result = listener(event)
+            if asyncio.iscoroutine(result):
+                await result
+
+    def deliver(event):
+        loop.call_soon_threadsafe(lambda: background_tasks.create(handle(event)))
+
+    unsubscribe = events.subscribe(deliver)
+    client.on_disconnect(unsubscribe)
+
+
 # --- UI ---
 
 
+if metrics.ENABLED:
+
+    @app.get("/metrics")
+    def serve_metrics():
+        """Serves the backend's timing and I/O metrics in the Prometheus format."""
+        return PlainTextResponse(
+            metrics.render(), media_type="text/plain; version=0.0.4"
+        )
+
+
 @ui.page("/")
-def main_page():
+async def main_page():
     """
     Renders the main application page layout.
     Includes the header, navigation tabs, and the container for tab panels.
     """
     ui.colors(primary="#5898d4")
+    # The dates this page shows. Kept per page, so navigating in one browser
+    # doesn't move the plan shown in the others.
+    view = {"current_date": date.today(), "view_days": state["view_days"]}
     # Enable dark mode
     dark = ui.dark_mode()
 
@@ -66,8 +119,8 @@ def main_page():
     with ui.dialog() as recipe_editor_dialog, ui.card().classes("w-full max-w-[600px] dark:bg-gray-900"):
         editor_content = ui.column().classes("w-full")
 
-    def open_editor(name=None, on_save=None):
-        open_recipe_editor(name, on_save, dialog=recipe_editor_dialog, container=editor_content)
+    async def open_editor(name=None, on_save=None):
+        await open_recipe_editor(name, on_save, dialog=recipe_editor_dialog, container=editor_content)
 
     # --- Main Content Area ---
     with ui.tab_panels(tabs, value="home").classes("w-full p-0"):
@@ -83,11 +136,11 @@ def main_page():
 
         # --- Meal Plan Tab ---
         with ui.tab_panel("plan"):
-            render_meal_plan_tab(open_editor)
+            await render_meal_plan_tab(open_editor, view)
 
         # --- Recipes Tab ---
         with ui.tab_panel("recipes"):
-            render_recipes_tab(open_editor)
+            await render_recipes_tab(open_editor)
 
         # --- Shopping List Tab ---
         with ui.tab_panel("shopping"):
@@ -95,57 +148,96 @@ def main_page():
 
         # --- Settings Tab ---
         with ui.tab_panel("settings"):
-            render_settings_tab()
+            render_settings_tab(view)
 
 
-def render_meal_plan_tab(open_editor_func):
+async def render_meal_plan_tab(open_editor_func, view):
     """
     Renders the 'Meal Plan' tab.
-    Displays the daily meal schedule based on 'state["view_days"]'.
+    Displays the daily meal schedule for the page's view: 'view["view_days"]'
+    days from 'view["current_date"]'.
     """
     with ui.column().classes("w-full"):
         # --- Date Navigation Controls ---
         with ui.row().classes("items-center justify-center mb-4"):
             ui.button(
-                icon="chevron_left", on_click=lambda: change_date(-state["view_days"])
+                icon="chevron_left", on_click=lambda: change_date(-view["view_days"])
             )
             ui.button("Today", on_click=lambda: reset_date())
             ui.button(
-                icon="chevron_right", on_click=lambda: change_date(state["view_days"])
+                icon="chevron_right", on_click=lambda: change_date(view["view_days"])
             )
             ui.label().bind_text_from(
-                state,
+                view,
                 "current_date",
                 backward=lambda d: f"Starting: {d.strftime('%Y-%m-%d')}",
             ).classes("text-gray-800 dark:text-gray-100")
+            ui.button(
+                "Bulk edit",
+                icon="date_range",
+                on_click=lambda: open_bulk_edit_dialog(
+                    refresh_plan, view["current_date"], view["view_days"]
+                ),
+            ).props("flat")
 
         # Container for the daily cards
         meal_plan_container = ui.row().classes(
             "w-full flex-wrap gap-4 items-start justify-center"
         )
 
-        def handle_drag_start(date_str, meal_type, index):
-            state["dragged_item"] = (date_str, meal_type, index)
+        # Drag state is kept per page so concurrent clients can't clobber it
+        drag = {"item": None}
 
-        def handle_drop(date_str, meal_type):
-            dragged = state.get("dragged_item")
+        def handle_drag_start(date_str, meal_type, index, recipe_name):
+            drag["item"] = (date_str, meal_type, index, recipe_name)
+
+        async def handle_drop(date_str, meal_type):
+            dragged = drag["item"]
             if not dragged:
                 return
-            src_date, src_meal, src_index = dragged
-            if cli.move_meal_plan_entry(src_date, src_meal, src_index, date_str, meal_type):
+            drag["item"] = None
+            src_date, src_meal, src_index, recipe_name = dragged
+            if await refresh_plan(
+                lambda: cli.move_meal_plan_entry(
+                    src_date, src_meal, src_index, date_str, meal_type, recipe_name
+                )
+            ):
                 ui.notify("Meal moved")
-                refresh_plan()
-            state["dragged_item"] = None
+            else:
+                notify_stale()
+
+        async def remove_entry(date_str, meal_type, index, recipe_name):
+            if not await refresh_plan(
+                lambda: cli.remove_from_meal_plan(date_str, meal_type, index, recipe_name)
+            ):
+                notify_stale()
+
+        async def change_servings(date_str, meal_type, index, recipe_name, servings):
+            saved = await refresh_plan(
+                lambda: cli.update_meal_plan_entry_servings(
+                    date_str, meal_type, index, servings, recipe_name
+                )
+            )
+            if not saved:
+                notify_stale()
+            return saved
+
+        def notify_stale():
+            ui.notify("This meal was changed in another session", type="warning")
 
-        def refresh_plan():
-            """Fetches meal plan data and rebuilds the UI cards."""
+        # What the grid currently shows: the layout it was built for, and
+        # for each (date, meal type) slot its entries container and the
+        # slot_key() of the entries drawn in it
+        grid = {"layout": None, "slots": {}}
+
+        def build_grid(start, days):
+            """Builds the day cards and empty meal slots for the visible dates."""
             meal_plan_container.clear()
-            plan_data = cli.get_meal_plan()
+            grid["slots"] = {}
             with meal_plan_container:
-                for i in range(state["view_days"]):
-                    d = state["current_date"] + timedelta(days=i)
+                for i in range(days):
+                    d = start + timedelta(days=i)
                     d_str = d.isoformat()
-                    day_data = plan_data.get(d_str, {})
                     is_today = d == date.today()
                     
                     # Highlight today's card
@@ -180,65 +272,107 @@ def render_meal_plan_tab(open_editor_func):
                                     ).props("round flat dense size=sm").classes(
                                         "text-gray-600 dark:text-gray-300"
                                     )
-
-                                items = day_data.get(m_type, [])
-                                if items:
-                                    for idx, item in enumerate(items):
-                                        if isinstance(item, dict):
-                                            r_name = item.get("recipe", "Unknown")
-                                            servings = item.get("servings", 1)
-                                            display_text = f"{r_name} ({servings})"
-                                        else:
-                                            r_name = item
-                                            servings = None
-                                            display_text = item
-
-                                        with ui.card().classes("w-full p-1 mb-1 dark:bg-gray-700 border dark:border-gray-600 cursor-move").props("draggable").on("dragstart", lambda e, d=d_str, m=m_type, i=idx: handle_drag_start(d, m, i)):
-                                            with ui.row().classes(
-                                                "w-full justify-between items-center"
-                                            ):
-                                                ui.label(display_text).classes(
-                                                    "text-sm dark:text-gray-100 cursor-pointer hover:underline"
-                                                ).on(
-                                                    "click",
-                                                    lambda _, n=r_name, s=servings, d=d_str, m=m_type, i=idx: open_recipe_details_dialog(
-                                                        n,
-                                                        s,
-                                                        on_servings_change=lambda val: cli.update_meal_plan_entry_servings(
-                                                            d, m, i, val
-                                                        ),
-                                                        on_close=lambda: refresh_plan(),
-                                                    ),
-                                                )
-                                                ui.button(
-                                                    icon="close",
-                                                    on_click=lambda e, d=d_str, m=m_type, i=idx: [
-                                                        cli.remove_from_meal_plan(d, m, i),
-                                                        refresh_plan(),
-                                                    ],
-                                                ).props(
-                                                    "round flat dense size=xs color=red"
-                                                )
-                                else:
-                                    ui.label("-").classes("text-xs text-gray-300")
-
-        refresh_plan()
-
-        def change_date(delta):
-            state["current_date"] += timedelta(days=delta)
-            refresh_plan()
-
-        def reset_date():
-            state["current_date"] = date.today()
-            refresh_plan()
-
-
-def open_recipe_details_dialog(
+                                entries = ui.column().classes("w-full gap-0")
+                            grid["slots"][(d_str, m_type)] = (entries, None)
+
+        def render_slot(d_str, m_type, items):
+            """Redraws the entries of one meal slot."""
+            entries = grid["slots"][(d_str, m_type)][0]
+            entries.clear()
+            with entries:
+                if items:
+                    for idx, item in enumerate(items):
+                        r_name = item.recipe
+                        servings = item.servings
+                        display_text = f"{r_name} ({servings})"
+
+                        with ui.card().classes("w-full p-1 mb-1 dark:bg-gray-700 border dark:border-gray-600 cursor-move").props("draggable").on("dragstart", lambda e, d=d_str, m=m_type, i=idx, n=r_name: handle_drag_start(d, m, i, n)):
+                            with ui.row().classes(
+                                "w-full justify-between items-center"
+                            ):
+                                ui.label(display_text).classes(
+                                    "text-sm dark:text-gray-100 cursor-pointer hover:underline"
+                                ).on(
+                                    "click",
+                                    lambda _, n=r_name, s=servings, d=d_str, m=m_type, i=idx: open_recipe_details_dialog(
+                                        n,
+                                        s,
+                                        on_servings_change=lambda val: change_servings(
+                                            d, m, i, n, val
+                                        ),
+                                        on_close=lambda: refresh_plan(),
+                                    ),
+                                )
+                                ui.button(
+                                    icon="close",
+                                    on_click=lambda e, d=d_str, m=m_type, i=idx, n=r_name: remove_entry(
+                                        d, m, i, n
+                                    ),
+                                ).props(
+                                    "round flat dense size=xs color=red"
+                                )
+                else:
+                    ui.label("-").classes("text-xs text-gray-300")
+            grid["slots"][(d_str, m_type)] = (entries, slot_key(items))
+
+        async def refresh_plan(change=None):
+            """
+            Fetches the visible meal plan and redraws only the slots that changed.
+
+            change is an optional function making backend edits first. It runs
+            on the backend thread in the same snapshot as the fetch, and its
+            result is returned. The day cards are rebuilt only when the
+            visible dates change, so e.g. moving a meal between two days
+            redraws exactly two slots.
+            """
+            start, days = view["current_date"], view["view_days"]
+
+            def load():
+                result = change() if change is not None else None
+                return result, cli.get_meal_plan_range(start, days)
+
+            result, plan_data = await async_api.run_in_snapshot(load)
+            layout = (start, days, date.today())
+            if grid["layout"] != layout:
+                build_grid(start, days)
+                grid["layout"] = layout
+            for (d_str, m_type), (_, shown) in list(grid["slots"].items()):
+                items = plan_data.get(d_str, {}).get(m_type, [])
+                if slot_key(items) != shown:
+                    render_slot(d_str, m_type, items)
+            return result
+
+        await refresh_plan()
+
+        async def on_data_changed(event):
+            # Only redraw for changes to the visible days
+            if event["kind"] == events.MEAL_PLAN_CHANGED:
+                visible = {d_str for d_str, _ in grid["slots"]}
+                if visible.intersection(event["dates"]):
+                    await refresh_plan()
+
+        subscribe_client(on_data_changed)
+
+        async def change_date(delta):
+            view["current_date"] += timedelta(days=delta)
+            await refresh_plan()
+
+        async def reset_date():
+            view["current_date"] = date.today()
+            await refresh_plan()
+
+
+async def open_recipe_details_dialog(
     recipe_name, initial_servings=None, on_servings_change=None, on_close=None
 ):
-    """Opens a dialog showing details for the specified recipe."""
-    recipes = cli.get_all_recipes()
-    recipe_data = recipes.get(recipe_name)
+    """
+    Opens a dialog showing details for the specified recipe.
+
+    on_servings_change is awaited with the new servings whenever they are
+    adjusted; if it returns False they weren't saved, and the dialog goes back
+    to the previous value. on_close runs when the dialog is dismissed.
+    """
+    recipe_data = await async_api.get_recipe(recipe_name)
 
     with ui.dialog() as dialog, ui.card().classes(
         "w-full max-w-lg dark:bg-gray-900"
@@ -298,7 +432,7 @@ def open_recipe_details_dialog(
                             "text-sm dark:text-gray-200"
                         )
 
-            def adjust_servings(delta):
+            async def adjust_servings(delta):
                 try:
                     current = int(servings_label.text)
                 except ValueError:
@@ -306,8 +440,9 @@ def open_recipe_details_dialog(
                 new_val = max(1, current + delta)
                 servings_label.set_text(str(new_val))
                 update_ingredients(new_val)
-                if on_servings_change:
-                    on_servings_change(new_val)
+                if on_servings_change and await on_servings_change(new_val) is False:
+                    servings_label.set_text(str(current))
+                    update_ingredients(current)
 
             # Initial render
             update_ingredients(current_servings)
@@ -326,24 +461,23 @@ def open_recipe_details_dialog(
     dialog.open()
 
 
-def open_recipe_editor(existing_name=None, on_save=None, dialog=None, container=None):
+async def open_recipe_editor(existing_name=None, on_save=None, dialog=None, container=None):
     """
     Opens a dialog to create or edit a recipe.
+    on_save is awaited with the saved recipe's name.
     """
+    data = await async_api.get_recipe(existing_name) if existing_name else None
     container.clear()
     ingredients_list = []
     instructions_list = []
     initial_servings = 1.0
     is_editing = False
 
-    if existing_name:
-        recipes = cli.get_all_recipes()
-        if existing_name in recipes:
-            is_editing = True
-            data = recipes[existing_name]
-            ingredients_list = [i.copy() for i in data.get("ingredients", [])]
-            instructions_list = data.get("instructions", [])[:]
-            initial_servings = float(data.get("servings", 1))
+    if data is not None:
+        is_editing = True
+        ingredients_list = [i.copy() for i in data.get("ingredients", [])]
+        instructions_list = data.get("instructions", [])[:]
+        initial_servings = float(data.get("servings", 1))
 
     with container:
         ui.label("Edit Recipe" if is_editing else "New Recipe").classes("text-xl font-bold dark:text-gray-100")
@@ -398,29 +532,30 @@ def open_recipe_editor(existing_name=None, on_save=None, dialog=None, container=
 
             with ui.row().classes("w-full justify-end mt-4"):
                 ui.button("Cancel", on_click=dialog.close).props("flat")
-                def save():
+                async def save():
                     if name_input.value:
                         final_name = name_input.value.lower()
-                        cli.add_recipe(final_name, ingredients_list, instructions_list, servings=float(servings_input.value or 1))
+                        await async_api.add_recipe(final_name, ingredients_list, instructions_list, servings=float(servings_input.value or 1))
                         if on_save:
-                            on_save(final_name)
+                            await on_save(final_name)
                         dialog.close()
                 ui.button("Save", on_click=save)
 
     dialog.open()
 
 
-def open_add_meal_dialog(date_str, meal_type, callback, open_editor_func):
+async def open_add_meal_dialog(date_str, meal_type, callback, open_editor_func):
     """
     Opens a dialog to add a recipe to a specific meal slot.
 
     Args:
         date_str (str): ISO formatted date string.
         meal_type (str): 'breakfast', 'lunch', 'dinner', or 'snack'.
-        callback (callable): Function to run after adding (usually to refresh UI).
-        open_editor_func (callable): Function to open the recipe editor.
+        callback (callable): Async function given a function that adds the
+            meal through cli; it runs it and refreshes the UI.
+        open_editor_func (callable): Async function opening the recipe editor.
     """
-    recipes = cli.get_all_recipes()
+    recipes = await async_api.get_all_recipes()
     options = sorted(list(recipes.keys()))
 
     with ui.dialog() as dialog, ui.card().classes("dark:bg-gray-900"):
@@ -442,7 +577,7 @@ def open_add_meal_dialog(date_str, meal_type, callback, open_editor_func):
         
         select.on_value_change(update_servings)
 
-        def save():
+        async def save():
             if select.value:
                 name = select.value
                 if name not in recipes:
@@ -451,13 +586,13 @@ def open_add_meal_dialog(date_str, meal_type, callback, open_editor_func):
                         ui.label("Do you want to create it?").classes("dark:text-gray-100")
                         with ui.row().classes("w-full justify-end"):
                             ui.button("No", on_click=confirm_dlg.close).props("flat")
-                            def proceed_create():
+                            async def proceed_create():
                                 confirm_dlg.close()
                                 dialog.close()
-                                open_editor_func(name, on_save=lambda n: [
-                                    cli.update_meal_plan(date_str, meal_type, n, float(servings_input.value or 1)),
-                                    callback()
-                                ])
+                                servings = float(servings_input.value or 1)
+                                await open_editor_func(name, on_save=lambda n: callback(
+                                    lambda: cli.update_meal_plan(date_str, meal_type, n, servings)
+                                ))
                             ui.button("Yes", on_click=proceed_create)
                     confirm_dlg.open()
                     return
@@ -466,8 +601,9 @@ def open_add_meal_dialog(date_str, meal_type, callback, open_editor_func):
                     s_val = float(servings_input.value)
                 except (ValueError, TypeError):
                     s_val = 1.0
-                cli.update_meal_plan(date_str, meal_type, select.value, s_val)
-                callback()
+                await callback(
+                    lambda: cli.update_meal_plan(date_str, meal_type, name, s_val)
+                )
                 dialog.close()
 
         with ui.row().classes("w-full justify-end"):
@@ -477,7 +613,62 @@ def open_add_meal_dialog(date_str, meal_type, callback, open_editor_func):
     dialog.open()
 
 
-def render_recipes_tab(open_editor_func):
+def open_bulk_edit_dialog(callback, start, days):
+    """
+    Opens a dialog to copy, repeat or clear many days of the meal plan at once.
+
+    Args:
+        callback (callable): Async function given a function that makes the
+            edit through cli; it runs it, refreshes the UI and returns its result.
+        start (date): First day shown on the page, the default range start.
+        days (int): Number of days shown, the default range length.
+    """
+
+    with ui.dialog() as dialog, ui.card().classes("w-full max-w-sm dark:bg-gray-900"):
+        ui.label("Bulk Edit").classes("text-xl font-bold dark:text-gray-100")
+        action = ui.select(
+            {"copy": "Copy days", "repeat": "Repeat a week", "clear": "Clear days"},
+            value="copy",
+            label="Action",
+        ).classes("w-full").props("outlined")
+        start_input = ui.input("From (YYYY-MM-DD)", value=start.isoformat()).classes("w-full").props("outlined")
+        days_input = ui.number("Days", value=days, min=1).classes("w-full").props("outlined")
+        days_input.bind_visibility_from(action, "value", backward=lambda v: v != "repeat")
+        dest_input = ui.input("Copy to (YYYY-MM-DD)", value=(start + timedelta(days=days)).isoformat()).classes("w-full").props("outlined")
+        dest_input.bind_visibility_from(action, "value", backward=lambda v: v == "copy")
+        times_input = ui.number("Weeks to fill", value=3, min=1).classes("w-full").props("outlined")
+        times_input.bind_visibility_from(action, "value", backward=lambda v: v == "repeat")
+        replace = ui.checkbox("Replace the meals planned there").classes("dark:text-gray-200")
+        replace.bind_visibility_from(action, "value", backward=lambda v: v != "clear")
+
+        async def apply():
+            try:
+                first = date.fromisoformat(start_input.value)
+                n_days = int(days_input.value)
+                dest = date.fromisoformat(dest_input.value)
+                times = int(times_input.value)
+            except (TypeError, ValueError):
+                ui.notify("Please enter valid dates and numbers", type="warning")
+                return
+            overwrite = replace.value
+            if action.value == "copy":
+                change = lambda: cli.copy_meal_plan_range(first, dest, n_days, overwrite)
+            elif action.value == "repeat":
+                change = lambda: cli.repeat_meal_plan_week(first, times, overwrite)
+            else:
+                change = lambda: cli.clear_meal_plan_range(first, n_days)
+            changed = await callback(change)
+            dialog.close()
+            ui.notify("Meal plan updated" if changed else "Nothing to change")
+
+        with ui.row().classes("w-full justify-end"):
+            ui.button("Cancel", on_click=dialog.close).props("flat")
+            ui.button("Apply", on_click=apply)
+
+    dialog.open()
+
+
+async def render_recipes_tab(open_editor_func):
     """
     Renders the 'Recipes' tab.
     Lists existing recipes and provides a button to create new ones.
@@ -496,9 +687,19 @@ def render_recipes_tab(open_editor_func):
         details_content = ui.column().classes("w-full")
         details_actions = ui.row().classes("w-full justify-end mt-4 gap-2")
 
-    def open_details(name):
-        recipes = cli.get_all_recipes()
-        data = recipes.get(name)
+    async def edit(name, close=None):
+        """Closes the given dialog, then opens the editor and reloads the list on save."""
+        if close is not None:
+            close.close()
+        await open_editor_func(name, on_save=lambda n: refresh_list(search_input.value))
+
+    async def delete(name):
+        await async_api.delete_recipe(name)
+        details_dialog.close()
+        await refresh_list(search_input.value)
+
+    async def open_details(name):
+        data = await async_api.get_recipe(name)
         if not data: return
         
         details_title.text = name.title()
@@ -515,8 +716,8 @@ def render_recipes_tab(open_editor_func):
         
         details_actions.clear()
         with details_actions:
-            ui.button("Delete", icon="delete", color="red", on_click=lambda: [cli.delete_recipe(name), details_dialog.close(), refresh_list(search_input.value)]).props("flat")
-            ui.button("Edit", icon="edit", on_click=lambda: [details_dialog.close(), open_editor_func(name, on_save=lambda n: refresh_list(search_input.value))]).props("flat")
+            ui.button("Delete", icon="delete", color="red", on_click=lambda: delete(name)).props("flat")
+            ui.button("Edit", icon="edit", on_click=lambda: edit(name, details_dialog)).props("flat")
             ui.button("Close", on_click=details_dialog.close).props("flat")
         
         details_dialog.open()
@@ -526,31 +727,28 @@ def render_recipes_tab(open_editor_func):
             ui.label("New Recipe Name").classes("text-xl font-bold dark:text-gray-100")
             name_input = ui.input("Name").classes("w-full").props("autofocus outlined")
 
-            def proceed():
+            async def proceed():
                 name = name_input.value.strip().lower()
                 if not name: return
-                recipes = cli.get_all_recipes()
                 
-                if name in recipes:
+                if await async_api.get_recipe(name) is not None:
                     ui.notify(f"Recipe '{name}' already exists.")
-                    dialog.close()
-                    open_editor_func(name, on_save=lambda n: refresh_list(search_input.value))
+                    await edit(name, dialog)
                     return
 
-                matches = difflib.get_close_matches(name, recipes.keys(), n=3, cutoff=0.6)
+                matches = await async_api.find_recipes(name, n=3, cutoff=0.6)
                 if matches:
                     dialog.close()
                     selection_content.clear()
                     with selection_content:
                         for match in matches:
-                            ui.button(f"Edit '{match}'", on_click=lambda _, m=match: [selection_dialog.close(), open_editor_func(m, on_save=lambda n: refresh_list(search_input.value))]).classes("w-full").props("flat border")
+                            ui.button(f"Edit '{match}'", on_click=lambda _, m=match: edit(m, selection_dialog)).classes("w-full").props("flat border")
                         
                         ui.separator().classes("my-2")
-                        ui.button(f"Create '{name}'", color="green", on_click=lambda: [selection_dialog.close(), open_editor_func(name, on_save=lambda n: refresh_list(search_input.value))]).classes("w-full")
+                        ui.button(f"Create '{name}'", color="green", on_click=lambda: edit(name, selection_dialog)).classes("w-full")
                     selection_dialog.open()
                 else:
-                    dialog.close()
-                    open_editor_func(name, on_save=lambda n: refresh_list(search_input.value))
+                    await edit(name, dialog)
 
             name_input.on("keydown.enter", proceed)
             with ui.row().classes("w-full justify-end mt-4"):
@@ -560,7 +758,7 @@ def render_recipes_tab(open_editor_func):
 
     with ui.column().classes("w-full max-w-6xl mx-auto p-4"):
         with ui.row().classes("w-full gap-4 mb-4 items-center"):
-            search_input = ui.input(placeholder="Search recipes...", on_change=lambda e: refresh_list(e.value)).props("outlined dense rounded").classes("flex-grow")
+            search_input = ui.input(placeholder="Search recipes...", on_change=lambda e: search_changed(e.value)).props("outlined dense rounded").classes("flex-grow")
             ui.button(
                 "New Recipe",
                 icon="add",
@@ -568,20 +766,66 @@ def render_recipes_tab(open_editor_func):
             ).props("unelevated color=primary")
 
         recipe_list = ui.grid().classes("w-full grid-cols-1 md:grid-cols-3 gap-4")
-
-        def refresh_list(filter_text=""):
-            """Reloads the list of recipes from storage."""
-            recipe_list.clear()
-            recipes = cli.get_all_recipes()
+        with ui.row().classes("w-full justify-center mt-4"):
+            more_button = ui.button("Show more", on_click=lambda: show_more()).props("flat")
+
+        # Names matching the current filter, and how many have cards so far
+        listing = {"names": [], "shown": 0}
+        # Bumped on every keystroke so only the last one refreshes the list
+        search = {"seq": 0}
+
+        async def search_changed(text):
+            search["seq"] += 1
+            seq = search["seq"]
+            await asyncio.sleep(SEARCH_DEBOUNCE)
+            if seq == search["seq"]:
+                await refresh_list(text or "")
+
+        def show_more():
+            """Adds the next page of recipe cards to the grid."""
+            names = listing["names"]
+            start = listing["shown"]
             with recipe_list:
-                for name in sorted(recipes.keys()):
-                    if filter_text.lower() and filter_text.lower() not in name.lower():
-                        continue
-                    
+                for name in names[start : start + RECIPES_PAGE_SIZE]:
                     with ui.card().classes("w-full h-32 flex flex-col justify-center items-center bg-gray-50 dark:bg-gray-900 border dark:border-gray-700 p-4 cursor-pointer hover:shadow-lg hover:scale-105 transition-all").on("click", lambda e, n=name: open_details(n)):
                         ui.label(name.title()).classes("text-xl font-bold text-center dark:text-gray-100")
+            listing["shown"] = min(start + RECIPES_PAGE_SIZE, len(names))
+            more_button.set_text(f"Show more ({len(names) - listing['shown']} left)")
+            more_button.set_visibility(listing["shown"] < len(names))
 
-        refresh_list()
+        async def refresh_list(filter_text=""):
+            """Lists the recipes matching filter_text, one page at a time."""
+            names = await async_api.recipes_containing(filter_text)
+            recipe_list.clear()
+            listing["names"] = names
+            listing["shown"] = 0
+            show_more()
+
+        await refresh_list()
+
+        async def on_data_changed(event):
+            # Only reload if the recipe appears in, or should join, the list
+            name = event.get("name")
+            if event["kind"] == events.RECIPE_DELETED:
+                stale = name in listing["names"]
+            elif event["kind"] == events.RECIPE_SAVED:
+                filter_text = (search_input.value or "").lower()
+                stale = filter_text in name.lower() and name not in listing["names"]
+            elif event["kind"] == events.RECIPES_SAVED:
+                filter_text = (search_input.value or "").lower()
+                listed = set(listing["names"])
+                stale = any(
+                    filter_text in n.lower() and n not in listed for n in event["names"]
+                )
+            else:
+                stale = False
+            if stale:
+                shown = listing["shown"]
+                await refresh_list(search_input.value or "")
+                while listing["shown"] < min(shown, len(listing["names"])):
+                    show_more()
+
+        subscribe_client(on_data_changed)
 
 
 def render_shopping_list_tab():
@@ -593,15 +837,19 @@ def render_shopping_list_tab():
         ui.label("Shopping List").classes("text-2xl mb-4 dark:text-gray-100")
 
         with ui.row().classes("items-center gap-4 mb-4"):
-            days_input = ui.number("Days", value=7, min=1, max=30).props("outlined dense").classes("w-24")
+            days_input = ui.number("Days", value=7, min=1, max=366).props("outlined dense").classes("w-24")
             ui.button("Generate", on_click=lambda: generate(days_input.value)).props("unelevated")
 
         result_area = ui.column().classes("w-full")
+        # The number of days the shown list covers, and its checkboxes by item
+        shown = {"days": None, "checkboxes": {}}
 
-        def generate(days):
+        async def generate(days):
             """Generates the shopping list data and renders checkboxes."""
+            data = await async_api.generate_shopping_list_data(date.today(), int(days))
             result_area.clear()
-            data = cli.generate_shopping_list_data(date.today(), int(days))
+            shown["days"] = int(days)
+            shown["checkboxes"] = {}
             sorted_items = sorted(data.keys())
             
             clipboard_text = []
@@ -622,7 +870,7 @@ def render_shopping_list_tab():
                     clipboard_text.append(f"- {line_text}")
 
                     with ui.row().classes("items-center"):
-                        ui.checkbox(line_text).classes(
+                        shown["checkboxes"][item] = ui.checkbox(line_text).classes(
                             "dark:text-gray-200"
                         )
             
@@ -630,11 +878,29 @@ def render_shopping_list_tab():
                     ui.separator().classes("my-4")
                     ui.button("Copy List", icon="content_copy", on_click=lambda: [ui.notify("Copied!"), ui.clipboard.write("\n".join(clipboard_text))]).props("flat icon-right")
 
+        async def on_data_changed(event):
+            """Regenerates the shown list if the change affects it, keeping the ticks."""
+            days = shown["days"]
+            if days is None:
+                return
+            if event["kind"] == events.MEAL_PLAN_CHANGED:
+                first = date.today()
+                last = (first + timedelta(days=days - 1)).isoformat()
+                if not any(first.isoformat() <= d <= last for d in event["dates"]):
+                    return
+            ticked = {item for item, box in shown["checkboxes"].items() if box.value}
+            await generate(days)
+            for item in ticked & shown["checkboxes"].keys():
+                shown["checkboxes"][item].value = True
+
+        subscribe_client(on_data_changed)
+
 
-def render_settings_tab():
+def render_settings_tab(view):
     """
     Renders the 'Settings' tab.
-    Provides UI to modify application settings (e.g., view_days).
+    Provides UI to modify application settings (e.g., view_days). A change
+    applies to new pages and to this page's view.
     """
     with ui.column().classes("w-full"):
         ui.label("Settings").classes("text-2xl mb-4 dark:text-gray-100")
@@ -645,9 +911,11 @@ def render_settings_tab():
              min=1, max=14
         ).classes("w-64").props("outlined")
 
-        def save():
-            state["view_days"] = int(days.value)
-            cli.save_data("settings.json", {"days_to_view": int(days.value)})
+        async def save():
+            state["view_days"] = view["view_days"] = int(days.value)
+            # Keep the other settings, such as the "logging" section
+            settings["days_to_view"] = int(days.value)
+            await async_api.save_data("settings.json", settings)
             ui.notify("Settings saved")
 
         ui.button("Save", on_click=save).classes("mt-4")
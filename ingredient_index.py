@@ -0,0 +1,158 @@
+"""
+Canonical ingredient names.
+Recipes refer to the same ingredient in several ways ("bell pepper",
+"bell pepper (red)", "bell peppers", "aubergine (eggplant)"). canonical_key()
+reduces a name to one key per ingredient, and IngredientIndex keeps the sorted
+list of known names together with the name each key is displayed as.
+"""
+
+import re
+from bisect import bisect_left
+
+# Other names for the same ingredient, applied after singularizing
+ALIASES = {
+    "aubergine": "eggplant",
+    "courgette": "zucchini",
+    "scallion": "green onion",
+    "spring onion": "green onion",
+    "garbanzo bean": "chickpea",
+    "canned garbanzo bean": "canned chickpea",
+    "parmesan cheese": "parmesan",
+    "parmigiano reggiano": "parmesan",
+}
+
+IRREGULAR_PLURALS = {"leaves": "leaf", "loaves": "loaf", "halves": "half"}
+
+# Words that end in "s" but aren't plurals
+SINGULAR_WORDS = {
+    "asparagus",
+    "couscous",
+    "hummus",
+    "molasses",
+    "swiss",
+    "grits",
+    "anise",
+    "citrus",
+    "octopus",
+    "hibiscus",
+}
+
+_PARENTHETICAL = re.compile(r"\([^)]*\)")
+
+
+def clean_name(name):
+    """Lowercases a name and drops parenthetical notes and extra whitespace."""
+    return " ".join(_PARENTHETICAL.sub(" ", name.lower()).split())
+
+
+def singularize(word):
+    """Returns the singular form of an English noun, using simple suffix rules."""
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+    if word in SINGULAR_WORDS or len(word) < 4 or not word.endswith("s"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if word.endswith(("ss", "us", "is")):
+        return word
+    return word[:-1]
+
+
+def canonical_key(name):
+    """
+    Reduces an ingredient name to the key it is aggregated under.
+
+    Example:
+        canonical_key("Bell Peppers (red)") -> "bell pepper"
+    """
+    words = clean_name(name).split(" ")
+    words[-1] = singularize(words[-1])
+    key = " ".join(words)
+    return ALIASES.get(key, key)
+
+
+class IngredientIndex:
+    """
+    Sorted list of known ingredient names with their canonical keys.
+
+    Each key is displayed as the shortest cleaned spelling seen for it, so
+    "bell peppers" and "bell pepper (red)" are listed as "bell pepper".
+    """
+
+    def __init__(self, names=()):
+        self.names = []
+        self._source = None
+        self._keys = {}  # name -> canonical key
+        self._display = {}  # canonical key -> display name
+        for name in names:
+            self.add(name)
+
+    def sync(self, names):
+        """
+        Follows the sorted names list returned by get_all_ingredients.
+
+        The list is shared, not copied. A different list (e.g. the file was
+        re-read) is indexed in full; names that storage inserts into the same
+        list are indexed by added(), so following it costs nothing per edit.
+        """
+        if names is not self._source:
+            self._source = self.names = names
+            for name in names:
+                self.canonical(name)
+
+    def added(self, names):
+        """Indexes names that storage just inserted into the followed list."""
+        for name in names:
+            self.canonical(name)
+
+    def __contains__(self, name):
+        i = bisect_left(self.names, name)
+        return i < len(self.names) and self.names[i] == name
+
+    def add(self, name):
+        """
+        Inserts a name in sorted position.
+
+        Returns:
+            bool: False if the name was already known.
+        """
+        if not insort_unique(self.names, name):
+            return False
+        self.canonical(name)
+        return True
+
+    def canonical(self, name):
+        """Returns the canonical key for a name and records how to display it."""
+        key = self._keys.get(name)
+        if key is None:
+            key = self._keys[name] = canonical_key(name)
+            spelling = clean_name(name)
+            shown = self._display.get(key)
+            if shown is None or (len(spelling), spelling) < (len(shown), shown):
+                self._display[key] = spelling
+        return key
+
+    def display(self, key):
+        """Returns the name a canonical key is shown as."""
+        return self._display.get(key, key)
+
+    def variants(self, name):
+        """Returns the known names that share a canonical key with name."""
+        key = canonical_key(name)
+        return [n for n in self.names if self.canonical(n) == key]
+
+
+def insort_unique(names, name):
+    """
+    Inserts name into the sorted list names unless it is already there.
+
+    Returns:
+        bool: True if the name was inserted.
+    """
+    i = bisect_left(names, name)
+    if i < len(names) and names[i] == name:
+        return False
+    names.insert(i, name)
+    return True
@@ -0,0 +1,479 @@
+"""
+JSON file storage backend for the Meal Planner application.
+Keeps recipes and ingredients in 'recipes.json' and 'ingredients.json', and the
+meal plan in one file per month under 'meal_plan/', listed in 'meal_plan.json'.
+cli.py uses this backend unless MEALPLANNER_BACKEND=sqlite.
+"""
+
+from collections.abc import MutableMapping
+from datetime import timedelta
+
+import storage
+from ingredient_index import insort_unique
+from migrate import schema_version, upgrade_meal_plan
+from models import MEAL_PLAN_SCHEMA_VERSION, MealEntry
+from storage import (
+    JournaledFile,
+    atomic_write,
+    encode_json,
+    load_data,
+    lock_for,
+    save_data,
+)
+
+
+def get_all_recipes():
+    """Retrieves all recipes from 'recipes.json'."""
+    try:
+        return load_data("recipes.json")
+    except FileNotFoundError:
+        return {}
+
+
+def _apply_ingredient_record(names, record):
+    """Applies an ingredients journal record: {"add": name}."""
+    # The list is kept sorted, so a new name is inserted in place
+    return insort_unique(names, record["add"])
+
+
+# New ingredient names are appended to 'ingredients.journal' instead of
+# rewriting the whole sorted list on every recipe save; compaction folds them
+# back into 'ingredients.json'.
+_ingredients = JournaledFile(
+    "ingredients.json", _apply_ingredient_record, default=list
+)
+
+
+def get_all_ingredients():
+    """Retrieves the sorted list of known ingredients from 'ingredients.json'."""
+    return _ingredients.load()
+
+
+def save_ingredients(names):
+    """Saves new ingredients to the database if they don't exist."""
+    # Names that are already known aren't journaled
+    with _ingredients.batch():
+        for name in names:
+            _ingredients.apply({"add": name})
+
+
+def add_recipe(name, ingredients, instructions, servings=1):
+    """Adds a new recipe or updates an existing one, then saves to storage."""
+    with lock_for("recipes.json"):
+        recipes = get_all_recipes()
+        recipes[name] = {
+            "ingredients": ingredients,
+            "instructions": instructions,
+            "servings": servings,
+        }
+        save_data("recipes.json", recipes)
+    # Ensure ingredients are in the ingredients database
+    save_ingredients([ing["item"] for ing in ingredients])
+
+
+def add_recipes(recipes):
+    """
+    Adds or updates many recipes with one write of 'recipes.json' and one
+    append to the ingredients journal.
+
+    Args:
+        recipes (dict): {name: {"ingredients", "instructions", "servings"}}.
+    """
+    with lock_for("recipes.json"):
+        stored = get_all_recipes()
+        for name, recipe in recipes.items():
+            stored[name] = {
+                "ingredients": recipe["ingredients"],
+                "instructions": recipe["instructions"],
+                "servings": recipe.get("servings", 1),
+            }
+        save_data("recipes.json", stored)
+    save_ingredients(
+        {ing["item"] for recipe in recipes.values() for ing in recipe["ingredients"]}
+    )
+
+
+def delete_recipe(name):
+    """Deletes a recipe by name if it exists."""
+    with lock_for("recipes.json"):
+        recipes = get_all_recipes()
+        if name in recipes:
+            del recipes[name]
+            save_data("recipes.json", recipes)
+            return True
+        return False
+
+
+def _pop_entry(plan, date_str, meal_type, index):
+    """Removes and returns an entry, dropping its meal and day once they are empty."""
+    entry = plan[date_str][meal_type].pop(index)
+    # Cleanup
+    if not plan[date_str][meal_type]:
+        del plan[date_str][meal_type]
+    if not plan[date_str]:
+        del plan[date_str]
+    return entry
+
+
+def _check_expected(plan, date_str, meal_type, index, expected_recipe):
+    """
+    Optimistic concurrency check for index-based edits.
+
+    Raises:
+        IndexError: If the entry at index is no longer expected_recipe, which
+        means the caller's view of the slot is out of date.
+    """
+    if expected_recipe is not None:
+        if plan[date_str][meal_type][index].recipe != expected_recipe:
+            raise IndexError(f"{date_str} {meal_type} entry {index} has changed")
+
+
+def _append_entry(plan, date_str, meal_type, entry):
+    """Appends an entry to a meal slot, creating the day and meal as needed."""
+    plan.setdefault(date_str, {}).setdefault(meal_type, []).append(entry)
+
+
+def _apply_plan_record(plan, record):
+    """
+    Applies one meal plan edit record (as stored in the journal) to the plan.
+
+    Returns:
+        bool: True if the plan changed.
+    """
+    op = record["op"]
+    date_str, meal_type = record.get("date"), record.get("meal")
+    try:
+        if op == "add":
+            entry = MealEntry.from_json(record["entry"])
+            _append_entry(plan, date_str, meal_type, entry)
+        elif op == "remove":
+            _check_expected(
+                plan, date_str, meal_type, record["index"], record.get("expected")
+            )
+            _pop_entry(plan, date_str, meal_type, record["index"])
+        elif op == "servings":
+            _check_expected(
+                plan, date_str, meal_type, record["index"], record.get("expected")
+            )
+            plan[date_str][meal_type][record["index"]].servings = record["servings"]
+        elif op == "move":
+            src_date, src_meal, src_index = record["src"]
+            dest_date, dest_meal = record["dest"]
+            _check_expected(plan, src_date, src_meal, src_index, record.get("expected"))
+            entry = _pop_entry(plan, src_date, src_meal, src_index)
+            _append_entry(plan, dest_date, dest_meal, entry)
+        elif op == "clear":
+            if meal_type is None:
+                del plan[date_str]
+            else:
+                del plan[date_str][meal_type]
+                if not plan[date_str]:  # Clean up empty day
+                    del plan[date_str]
+        elif op == "edits":
+            # A bulk edit: its records are journaled (and so survive a
+            # crash) together
+            changed = [_apply_plan_record(plan, edit) for edit in record["edits"]]
+            return any(changed)
+        else:
+            raise ValueError(f"Unknown meal plan operation: {op}")
+    except (KeyError, IndexError):
+        return False
+    return True
+
+
+# Month files live in this directory, next to the 'meal_plan.json' manifest
+PLAN_DIR = "meal_plan"
+
+
+def _decode_days(days):
+    """Converts stored {date: {meal_type: [entries]}} days to MealEntry objects."""
+    return {
+        date_str: {
+            meal_type: [MealEntry.from_json(entry) for entry in items]
+            for meal_type, items in day_plan.items()
+        }
+        for date_str, day_plan in days.items()
+    }
+
+
+def _encode_days(days):
+    """Converts {date: {meal_type: [MealEntry]}} days back to their stored form."""
+    return {
+        date_str: {
+            meal_type: [entry.to_json() for entry in items]
+            for meal_type, items in day_plan.items()
+        }
+        for date_str, day_plan in days.items()
+    }
+
+
+class MonthlyPlan(MutableMapping):
+    """
+    The meal plan as {date: {meal_type: [MealEntry]}}, stored one file per month.
+
+    'meal_plan.json' is a manifest naming each month's file in 'meal_plan/'.
+    A month is only read the first time one of its days is looked up, so
+    showing a week doesn't parse years of history.
+
+    Month files are named after a hash of their content and never modified.
+    Saving writes new files for the months that changed and then the
+    manifest, so replacing the manifest is the single commit point.
+    """
+
+    def __init__(self, files=None, months=None):
+        self._files = dict(files or {})  # month -> file name in PLAN_DIR
+        self._months = dict(months or {})  # month -> {date: day plan}, once read
+
+    def _month(self, month, create=False):
+        """Returns a month's days, reading its file on first use."""
+        days = self._months.get(month)
+        if days is None:
+            name = self._files.get(month)
+            if name is not None:
+                try:
+                    doc = storage.read_json(storage.BASE_DIR / PLAN_DIR / name)
+                except FileNotFoundError:
+                    doc = self._reread_month(month)
+                days = _decode_days(doc["days"])
+            elif create:
+                days = {}
+            else:
+                return None
+            # Another thread may have read it meanwhile; keep the first copy
+            days = self._months.setdefault(month, days)
+        return days
+
+    def _reread_month(self, month):
+        """
+        Reads a month from the file the current manifest names for it.
+
+        Used when this plan's file for the month is gone, which happens when
+        the plan was loaded two or more compactions ago and the month hasn't
+        been read since. The month then shows its newer saved content.
+        """
+        # Compaction holds this lock while it replaces and deletes files
+        with lock_for("meal_plan.json"):
+            try:
+                manifest = storage.read_json(storage.BASE_DIR / "meal_plan.json")
+            except FileNotFoundError:
+                manifest = {}
+            name = manifest.get("months", {}).get(month)
+            if name is None:
+                return {"days": {}}
+            self._files[month] = name
+            return storage.read_json(storage.BASE_DIR / PLAN_DIR / name)
+
+    def months(self):
+        """Returns the planned months ("YYYY-MM"), oldest first."""
+        return sorted(self._files.keys() | self._months.keys())
+
+    def __getitem__(self, date_str):
+        days = self._month(date_str[:7])
+        if days is None:
+            raise KeyError(date_str)
+        return days[date_str]
+
+    def __setitem__(self, date_str, day_plan):
+        self._month(date_str[:7], create=True)[date_str] = day_plan
+
+    def __delitem__(self, date_str):
+        days = self._month(date_str[:7])
+        if days is None:
+            raise KeyError(date_str)
+        del days[date_str]
+
+    def __iter__(self):
+        for month in self.months():
+            yield from self._month(month)
+
+    def __len__(self):
+        return sum(len(self._month(month)) for month in self.months())
+
+    def to_manifest(self):
+        """Writes the months that changed and returns the new manifest."""
+        import hashlib
+
+        directory = storage.BASE_DIR / PLAN_DIR
+        directory.mkdir(exist_ok=True)
+        files = dict(self._files)
+        for month, days in list(self._months.items()):
+            if not days:
+                files.pop(month, None)
+                continue
+            raw = encode_json(
+                {"schema_version": MEAL_PLAN_SCHEMA_VERSION, "days": _encode_days(days)}
+            )
+            name = f"{month}.{hashlib.blake2b(raw, digest_size=8).hexdigest()}.json"
+            if files.get(month) != name:
+                atomic_write(directory / name, raw)
+                files[month] = name
+
+        # Files of the manifest being replaced are kept for readers that
+        # loaded it. Readers of an older manifest re-read it if one of their
+        # files is gone (see _reread_month).
+        keep = set(files.values()) | set(self._files.values())
+        for pattern in ("*.json", "*.json.snap"):
+            for path in directory.glob(pattern):
+                if path.name.removesuffix(".snap") not in keep:
+                    path.unlink(missing_ok=True)
+
+        self._files = files
+        return {
+            "schema_version": MEAL_PLAN_SCHEMA_VERSION,
+            "months": dict(sorted(files.items())),
+        }
+
+
+def _decode_plan(doc):
+    """Turns the 'meal_plan.json' manifest into a MonthlyPlan."""
+    version = schema_version(doc)
+    if version == MEAL_PLAN_SCHEMA_VERSION:
+        upgraded = False
+    else:
+        # Only the version 1 upgrade looks up recipes, so don't load them
+        # for the others
+        recipes = get_all_recipes() if version < 2 else {}
+        doc, upgraded = upgrade_meal_plan(doc, recipes)
+    files, months = {}, {}
+    for month, value in doc["months"].items():
+        if isinstance(value, str):
+            files[month] = value
+        else:  # Inline days, just upgraded from a single-file plan
+            months[month] = _decode_days(value["days"])
+    return MonthlyPlan(files, months), upgraded
+
+
+# Meal plan edits are appended to 'meal_plan.journal' and periodically
+# compacted into the month files. Older meal plan formats are upgraded when
+# the plan is loaded.
+_plan = JournaledFile(
+    "meal_plan.json",
+    _apply_plan_record,
+    default=MonthlyPlan,
+    decode=_decode_plan,
+    encode=MonthlyPlan.to_manifest,
+)
+
+
+def batch():
+    """
+    Saves the meal plan edits made in the block with one journal write.
+
+    Recipe and ingredient edits are still saved one by one.
+    """
+    return _plan.batch()
+
+
+def get_meal_plan():
+    """
+    Retrieves the current meal plan.
+
+    Returns:
+        MonthlyPlan: A {date: {meal_type: [MealEntry]}} mapping that reads
+        each month from disk when it is first accessed.
+    """
+    return _plan.load()
+
+
+def compact_meal_plan():
+    """Folds the journaled meal plan edits into the month files."""
+    _plan.compact()
+
+
+def get_meal_plan_version():
+    """Returns a token that changes whenever the meal plan changes."""
+    return _plan.version
+
+
+def get_meal_plan_range(start_date, days):
+    """
+    Returns the planned days between start_date and start_date + days.
+
+    Only the month files covering the range are read.
+    """
+    plan = get_meal_plan()
+    window = {}
+    for i in range(days):
+        d_str = (start_date + timedelta(days=i)).isoformat()
+        if d_str in plan:
+            window[d_str] = plan[d_str]
+    return window
+
+
+def update_meal_plan(date_str, meal_type, recipe_name, servings=1):
+    """Adds a recipe to the meal plan for a specific date and meal type."""
+    _plan.apply(
+        {
+            "op": "add",
+            "date": date_str,
+            "meal": meal_type,
+            "entry": {"recipe": recipe_name, "servings": servings},
+        }
+    )
+
+
+def remove_from_meal_plan(date_str, meal_type, index, expected_recipe=None):
+    """Removes a recipe from the meal plan at the specified index."""
+    return _plan.apply(
+        {
+            "op": "remove",
+            "date": date_str,
+            "meal": meal_type,
+            "index": index,
+            "expected": expected_recipe,
+        }
+    )
+
+
+def update_meal_plan_entry_servings(
+    date_str, meal_type, index, servings, expected_recipe=None
+):
+    """Updates the servings for a specific meal plan entry."""
+    return _plan.apply(
+        {
+            "op": "servings",
+            "date": date_str,
+            "meal": meal_type,
+            "index": index,
+            "servings": servings,
+            "expected": expected_recipe,
+        }
+    )
+
+
+def move_meal_plan_entry(
+    src_date, src_meal, src_index, dest_date, dest_meal, expected_recipe=None
+):
+    """Moves a meal plan entry from one slot to another."""
+    return _plan.apply(
+        {
+            "op": "move",
+            "src": [src_date, src_meal, src_index],
+            "dest": [dest_date, dest_meal],
+            "expected": expected_recipe,
+        }
+    )
+
+
+def clear_meal_plan(date_str, meal_type=None):
+    """
+    Clears a whole day, or a single meal of that day, from the meal plan.
+
+    Returns:
+        bool: True if anything was removed.
+    """
+    return _plan.apply({"op": "clear", "date": date_str, "meal": meal_type})
+
+
+def apply_meal_plan_edits(edits):
+    """
+    Applies a list of meal plan edit records with a single journal write.
+
+    The records use the journal format ("add", "remove", "servings", "move"
+    and "clear" ops) and are applied in order; the whole list is stored as
+    one record, so it is saved, or lost in a crash, as a unit.
+
+    Returns:
+        bool: True if the plan changed.
+    """
+    return _plan.apply({"op": "edits", "edits": list(edits)})
@@ -0,0 +1,211 @@
+"""
+Logging setup for the Meal Planner application.
+Records are put on a queue and written by a background thread, so a log call
+never waits on file I/O (in the GUI, it would block the event loop).
+'debug.log' holds one JSON object per line and rotates by size instead of
+being truncated at every start.
+
+Importing this module routes the records of the app and of libraries to the
+log file; the queue, its thread and the file itself are only set up when the
+first record is logged. The app's modules log through logger.py, which only
+imports this module when they first do.
+
+The "logging" section of settings.json can change the defaults:
+
+    "logging": {
+        "level": "DEBUG",
+        "levels": {"storage": "INFO", "nicegui": "WARNING"},
+        "sample": {"recipe_index": 100},
+        "max_bytes": 5000000,
+        "backups": 3
+    }
+
+"levels" and "sample" are keyed by the module that logged, for the app's own
+modules, or by logger name (and its parents) for libraries. "sample" keeps one
+in every N DEBUG records from each line of that module's code, for events too
+frequent to log every time.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+LOG_FILE = "debug.log"
+DEFAULT_SETTINGS = {
+    "level": "DEBUG",
+    "levels": {},
+    "sample": {},
+    "max_bytes": 5_000_000,
+    "backups": 3,
+}
+
+logger = logging.getLogger(__name__)
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one line of JSON."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "module": _source(record),
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        sampled = getattr(record, "sampled", None)
+        if sampled:
+            entry["sampled"] = sampled
+        traceback = getattr(record, "traceback", None)
+        if traceback:
+            entry["exception"] = traceback
+        return json.dumps(entry)
+
+
+def _source(record):
+    """Returns the module (for the app's logger) or logger name of a record."""
+    return record.module if record.name == __name__ else record.name
+
+
+def _lookup(table, source):
+    """Finds source, or its closest dotted parent, in a settings table."""
+    while True:
+        if source in table:
+            return table[source]
+        if "." not in source:
+            return None
+        source = source.rsplit(".", 1)[0]
+
+
+class _MessageFormatter(logging.Formatter):
+    """
+    Formats just the message of a record about to be queued.
+
+    The traceback, if any, is kept apart in record.traceback for
+    JsonFormatter, since the queued copy loses its exc_info.
+    """
+
+    def format(self, record):
+        if record.exc_info:
+            record.traceback = self.formatException(record.exc_info)
+        return record.getMessage()
+
+
+class LevelFilter(logging.Filter):
+    """Applies per-module levels and samples frequent DEBUG records."""
+
+    def __init__(self, default, levels, sample):
+        super().__init__()
+        self.default = default
+        self.levels = levels
+        self.sample = sample
+        self._counters = {}  # {(module, line): itertools.count()}
+
+    def filter(self, record):
+        source = _source(record)
+        level = _lookup(self.levels, source)
+        if record.levelno < (self.default if level is None else level):
+            return False
+        every = _lookup(self.sample, source)
+        if every and every > 1 and record.levelno <= logging.DEBUG:
+            counter = self._counters.setdefault(
+                (source, record.lineno), itertools.count()
+            )
+            if next(counter) % every:
+                return False
+            record.sampled = every
+        return True
+
+
+def _read_settings():
+    """Returns the "logging" settings merged over the defaults."""
+    data_dir = os.environ.get("MEALPLANNER_DATA_DIR") or Path(__file__).parent
+    try:
+        with open(Path(data_dir) / "settings.json", encoding="utf-8") as f:
+            configured = json.load(f).get("logging", {})
+    except (OSError, ValueError, AttributeError):
+        configured = {}
+    return {**DEFAULT_SETTINGS, **configured}
+
+
+def configure():
+    """
+    Sends log records through a queue to the rotating JSON log file.
+
+    Calling it again (e.g. after settings.json changed) replaces the previous
+    setup.
+    """
+    global _listener, _queue_handler
+    import queue
+    from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+    settings = _read_settings()
+    default = logging.getLevelName(str(settings["level"]).upper())
+    levels = {
+        name: logging.getLevelName(str(level).upper())
+        for name, level in settings["levels"].items()
+    }
+    if not all(isinstance(level, int) for level in [default, *levels.values()]):
+        default, levels = logging.DEBUG, {}
+
+    file_handler = RotatingFileHandler(
+        LOG_FILE,
+        maxBytes=settings["max_bytes"],
+        backupCount=settings["backups"],
+        encoding="utf-8",
+        delay=True,
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.setFormatter(_MessageFormatter())
+    queue_handler.addFilter(LevelFilter(default, levels, settings["sample"]))
+
+    # The root logger also collects the records of libraries such as NiceGUI
+    root = logging.getLogger()
+    _shutdown()
+    for handler in list(root.handlers):
+        if isinstance(handler, (QueueHandler, _SetupOnFirstRecord)):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(min([default, *levels.values()]))
+
+    _listener = QueueListener(records, file_handler)
+    _listener.start()
+    _queue_handler = queue_handler
+
+
+class _SetupOnFirstRecord(logging.Handler):
+    """Stands in for the queue handler until the first record is logged."""
+
+    def emit(self, record):
+        with _setup_lock:
+            if _queue_handler is None:
+                configure()
+        _queue_handler.handle(record)
+
+
+def _shutdown():
+    """Writes out the queued records and closes the log file."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(_shutdown)
+logging.getLogger().addHandler(_SetupOnFirstRecord())
+logging.getLogger().setLevel(logging.DEBUG)
@@ -1,10 +1,19 @@
-import logging
+"""
+The shared logger of the Meal Planner application.
+Modules log through `logger`, which stands in for the logging.Logger set up by
+log_setup.py. Importing logging takes longer than the rest of a short CLI
+command, so it's only imported, and the log file set up, when the first
+record is logged.
+"""
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    filename="debug.log",
-    filemode="w",
-)
 
-logger = logging.getLogger(__name__)
+class _Logger:
+    """Forwards to log_setup.logger, importing it on first use."""
+
+    def __getattr__(self, name):
+        from log_setup import logger
+
+        return getattr(logger, name)
+
+
+logger = _Logger()
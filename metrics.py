@@ -0,0 +1,119 @@
+"""
+Timing and I/O metrics for the Meal Planner backend.
+Records a latency histogram (and so a call count) for each function decorated
+with timed(), and the bytes read from and written to each data file, and
+renders them in the Prometheus text format. gui.py serves them at /metrics.
+
+Metrics are off unless MEALPLANNER_METRICS=1. While they are off, timed()
+returns the function it decorates unchanged and count_bytes() returns at
+once, so instrumented code runs as if it weren't instrumented.
+
+Bytes are only counted for the JSON backend's files; SQLite does its own I/O.
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+ENABLED = os.environ.get("MEALPLANNER_METRICS", "0") == "1"
+
+# Upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+_lock = threading.Lock()
+
+# {function: [count per bucket..., count above the last bucket, total seconds]}
+_latencies = {}
+
+# {(direction, file): bytes}
+_bytes = {}
+
+
+def observe(function, seconds):
+    """Adds one call's duration to a function's histogram."""
+    bucket = bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _latencies.get(function)
+        if histogram is None:
+            histogram = _latencies[function] = [0] * (len(BUCKETS) + 1) + [0.0]
+        histogram[bucket] += 1
+        histogram[-1] += seconds
+
+
+def timed(func):
+    """Decorator recording the latency of every call, if metrics are enabled."""
+    if not ENABLED:
+        return func
+    name = f"{func.__module__}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observe(name, time.perf_counter() - started)
+
+    return wrapper
+
+
+def count_bytes(direction, file, size):
+    """
+    Adds to the bytes read from or written to a data file.
+
+    Args:
+        direction (str): "read" or "written".
+        file (str): The file, or the directory of a set of files.
+        size (int): Number of bytes.
+    """
+    if not ENABLED:
+        return
+    key = (direction, file)
+    with _lock:
+        _bytes[key] = _bytes.get(key, 0) + size
+
+
+def _labels(**labels):
+    """Formats {name="value",...} with the values escaped."""
+    pairs = []
+    for key, value in labels.items():
+        value = value.replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def render():
+    """Returns every metric in the Prometheus text exposition format."""
+    with _lock:
+        latencies = {name: list(h) for name, h in _latencies.items()}
+        sizes = dict(_bytes)
+
+    duration = "mealplanner_call_duration_seconds"
+    lines = [
+        f"# HELP {duration} Time spent in backend calls.",
+        f"# TYPE {duration} histogram",
+    ]
+    for name, histogram in sorted(latencies.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), histogram):
+            cumulative += count
+            lines.append(
+                f"{duration}_bucket{_labels(function=name, le=str(bound))} {cumulative}"
+            )
+        labels = _labels(function=name)
+        lines.append(f"{duration}_sum{labels} {histogram[-1]}")
+        lines.append(f"{duration}_count{labels} {cumulative}")
+
+    storage_bytes = "mealplanner_storage_bytes_total"
+    lines += [
+        f"# HELP {storage_bytes} Bytes read from and written to the data files.",
+        f"# TYPE {storage_bytes} counter",
+    ]
+    for (direction, file), size in sorted(sizes.items()):
+        labels = _labels(direction=direction, file=file)
+        lines.append(f"{storage_bytes}{labels} {size}")
+    return "\n".join(lines) + "\n"
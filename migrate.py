@@ -0,0 +1,122 @@
+"""
+Meal plan format migrations.
+Upgrades stored meal plans to MEAL_PLAN_SCHEMA_VERSION. Both storage backends
+upgrade automatically the first time they load an older plan; run this module
+to upgrade the files explicitly (a copy of the old meal_plan.json is kept):
+
+    python migrate.py
+"""
+
+import json
+
+from models import MEAL_PLAN_SCHEMA_VERSION
+
+
+def schema_version(doc):
+    """Returns the schema version of a stored meal plan document."""
+    if isinstance(doc, dict) and "schema_version" in doc:
+        return doc["schema_version"]
+    return 1
+
+
+def _upgrade_v1(doc, recipes):
+    """
+    Wraps a version 1 plan and turns bare recipe names into dict entries.
+
+    A bare name meant "the recipe's own servings", so that is what it becomes.
+    """
+    days = {}
+    for date_str, day_plan in doc.items():
+        days[date_str] = {
+            meal_type: [
+                (
+                    entry
+                    if isinstance(entry, dict)
+                    else {
+                        "recipe": entry,
+                        "servings": recipes.get(entry, {}).get("servings", 1),
+                    }
+                )
+                for entry in items
+            ]
+            for meal_type, items in day_plan.items()
+        }
+    return {"schema_version": 2, "days": days}
+
+
+def _upgrade_v2(doc, recipes):
+    """
+    Groups a version 2 plan's days by month.
+
+    The months are kept inline; the JSON backend writes each one to its own
+    file the next time it saves the plan.
+    """
+    months = {}
+    for date_str, day_plan in doc["days"].items():
+        month = months.setdefault(date_str[:7], {"days": {}})
+        month["days"][date_str] = day_plan
+    return {"schema_version": 3, "months": months}
+
+
+# {version: function upgrading a document of that version by one step}
+UPGRADES = {1: _upgrade_v1, 2: _upgrade_v2}
+
+
+def upgrade_meal_plan(doc, recipes):
+    """
+    Brings a stored meal plan document up to the current schema version.
+
+    Args:
+        doc: The parsed meal_plan.json document.
+        recipes (dict): All recipes, used to fill in missing servings.
+
+    Returns:
+        tuple: (document, upgraded) where upgraded is True if doc was older.
+
+    Raises:
+        ValueError: If the document was written by a newer version of the app.
+    """
+    version = schema_version(doc)
+    if version > MEAL_PLAN_SCHEMA_VERSION:
+        raise ValueError(
+            f"meal plan schema version {version} is newer than this app "
+            f"supports ({MEAL_PLAN_SCHEMA_VERSION})"
+        )
+    upgraded = version < MEAL_PLAN_SCHEMA_VERSION
+    while version < MEAL_PLAN_SCHEMA_VERSION:
+        doc = UPGRADES[version](doc, recipes)
+        version = schema_version(doc)
+    return doc, upgraded
+
+
+def main():
+    """Upgrades meal_plan.json and, if present, the SQLite database."""
+    # The backends import this module, so import them only when run
+    import shutil
+
+    import json_store
+    import sqlite_store
+    import storage
+
+    path = storage.BASE_DIR / "meal_plan.json"
+    if path.exists():
+        version = schema_version(json.loads(path.read_bytes()))
+        if version < MEAL_PLAN_SCHEMA_VERSION:
+            backup = path.with_name(f"meal_plan.v{version}.json")
+            shutil.copy2(path, backup)
+            print(f"Saved a copy of meal_plan.json as {backup.name}")
+        # Loading upgrades the plan and writes it back
+        json_store.get_meal_plan()
+        json_store.compact_meal_plan()
+        print(f"meal_plan.json is at schema version {MEAL_PLAN_SCHEMA_VERSION}")
+
+    if (storage.BASE_DIR / sqlite_store.DB_FILE).exists():
+        # Connecting upgrades the database
+        sqlite_store.get_meal_plan()
+        print(
+            f"{sqlite_store.DB_FILE} is at schema version {MEAL_PLAN_SCHEMA_VERSION}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+In-memory records for the Meal Planner application.
+"""
+
+# Version of the stored meal plan format. Version 1 was a bare
+# {date: {meal_type: [entries]}} dict whose entries were either recipe names
+# or {"recipe", "servings"} dicts; version 2 wraps the days as
+# {"schema_version": 2, "days": {...}} and only stores dict entries; version 3
+# splits the days into one file per month, listed in a manifest.
+MEAL_PLAN_SCHEMA_VERSION = 3
+
+
+class MealEntry:
+    """One planned recipe in a meal slot."""
+
+    __slots__ = ("recipe", "servings")
+
+    def __init__(self, recipe, servings=1):
+        self.recipe = recipe
+        self.servings = servings
+
+    def __repr__(self):
+        return f"MealEntry({self.recipe!r}, {self.servings!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, MealEntry):
+            return NotImplemented
+        return self.recipe == other.recipe and self.servings == other.servings
+
+    @classmethod
+    def from_json(cls, value):
+        """Builds an entry from its stored {"recipe", "servings"} form."""
+        return cls(value["recipe"], value.get("servings", 1))
+
+    def to_json(self):
+        return {"recipe": self.recipe, "servings": self.servings}
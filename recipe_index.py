@@ -0,0 +1,309 @@
+"""
+Compiled recipe index used to aggregate shopping lists.
+
+Each recipe is compiled once into interned ingredient/unit slot IDs and a float
+array of quantities, so aggregating a shopping list is a sparse vector sum over
+the planned entries instead of re-parsing every ingredient line each time.
+Ingredient names and units are canonicalized during compilation; quantities
+are summed in each dimension's base unit and listed in the unit the recipes
+use most for that item.
+
+Long date ranges are summed with NumPy when it is installed; both paths give
+exactly the same totals. NumPy is only imported the first time a range is long
+enough to use it, so short-lived processes don't pay for loading it.
+"""
+
+from array import array
+
+from ingredient_index import IngredientIndex
+from units import canonical_unit, normalize, unit_size
+
+# NumPy, once _numpy() has tried to import it: the module, or None if it
+# isn't installed (aggregate() then falls back to pure Python)
+_np = False
+
+
+def _numpy():
+    """Imports NumPy on first use; returns None if it isn't installed."""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
+
+# Below this many planned entries the NumPy setup costs more than it saves
+VECTORIZE_MIN_ENTRIES = 1000
+
+
+class CompiledRecipe:
+    """A recipe reduced to the numbers needed for aggregation."""
+
+    __slots__ = ("base_servings", "slots", "quantities", "units")
+
+    def __init__(self, base_servings, slots, quantities, units):
+        self.base_servings = base_servings
+        self.slots = slots  # array of slot IDs, one per ingredient line
+        self.quantities = quantities  # array of quantities for base_servings
+        self.units = units  # the unit each line was written in, canonicalized
+
+
+class RecipeIndex:
+    """
+    Compiles recipes on first use and keeps them until they change.
+
+    The index follows one recipes dict (as returned by get_all_recipes). If a
+    different dict is passed to sync(), for example after the file was
+    re-read, every compiled recipe is dropped and recompiled lazily. Edits
+    made in place must be reported with discard().
+
+    Ingredient names are merged through an IngredientIndex, so shopping lists
+    list "tomato" and "tomatoes (diced)" as one item.
+    """
+
+    def __init__(self, ingredients=None):
+        if ingredients is None:
+            ingredients = IngredientIndex()
+        self.ingredients = ingredients
+        self._source = None
+        self._compiled = {}
+        # Interned (ingredient key, unit) pairs; the position is the slot ID
+        self._slot_ids = {}
+        self._slot_keys = []
+        # {slot ID: {unit: compiled lines written in it}}, to list each slot
+        # in the unit its recipes use
+        self._slot_units = {}
+
+    @property
+    def source(self):
+        """The recipes dict the index currently follows."""
+        return self._source
+
+    def sync(self, recipes):
+        """Points the index at the current recipes dict."""
+        if recipes is not self._source:
+            self._source = recipes
+            self._compiled.clear()
+            self._slot_units.clear()
+
+    def discard(self, name):
+        """Forgets the compiled form of a recipe that was added, edited or deleted."""
+        compiled = self._compiled.pop(name, None)
+        if compiled is not None:
+            for slot, unit in zip(compiled.slots, compiled.units):
+                self._slot_units[slot][unit] -= 1
+
+    def _slot(self, name, unit):
+        key = (name, unit)
+        slot = self._slot_ids.get(key)
+        if slot is None:
+            slot = self._slot_ids[key] = len(self._slot_keys)
+            self._slot_keys.append(key)
+        return slot
+
+    def get(self, name):
+        """Returns the compiled recipe, or None if the recipe doesn't exist."""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            r_data = self._source.get(name) if self._source is not None else None
+            if r_data is None:
+                return None
+            slots = array("q")
+            quantities = array("d")
+            units = []
+            for ing in r_data.get("ingredients", []):
+                # Convert to the unit the item is aggregated in, so that
+                # e.g. tbsp and ml of the same item add up
+                unit, factor = normalize(ing["unit"])
+                key = self.ingredients.canonical(ing["item"])
+                slot = self._slot(key, unit)
+                slots.append(slot)
+                units.append(canonical_unit(ing["unit"]))
+                tally = self._slot_units.setdefault(slot, {})
+                tally[units[-1]] = tally.get(units[-1], 0) + 1
+                try:
+                    quantities.append(float(ing["quantity"]) * factor)
+                except (ValueError, TypeError):
+                    quantities.append(0.0)
+            compiled = CompiledRecipe(
+                float(r_data.get("servings", 1)), slots, quantities, units
+            )
+            self._compiled[name] = compiled
+        return compiled
+
+    def scale(self, recipe_name, planned_servings):
+        """
+        Looks up a planned entry's recipe and servings scaling factor.
+
+        Returns:
+            tuple: (CompiledRecipe, scaling), or None if the recipe doesn't exist.
+        """
+        compiled = self.get(recipe_name)
+        if compiled is None:
+            return None
+        base_servings = compiled.base_servings
+        if planned_servings is None:
+            planned_servings = base_servings
+        return compiled, planned_servings / base_servings if base_servings else 1.0
+
+    def aggregate(self, entries, counts=None):
+        """
+        Sums the ingredients of planned entries.
+
+        Args:
+            entries (iterable): (recipe_name, planned_servings) pairs, where
+                planned_servings is None to cook the recipe's own servings.
+            counts (dict, optional): Filled with {slot ID: number of ingredient
+                lines that contributed to it}.
+
+        Returns:
+            dict: {slot ID: total quantity}, in order of first appearance.
+        """
+        scaled = []
+        for recipe_name, planned_servings in entries:
+            pair = self.scale(recipe_name, planned_servings)
+            if pair is not None:
+                scaled.append(pair)
+
+        if len(scaled) >= VECTORIZE_MIN_ENTRIES and _numpy() is not None:
+            return _aggregate_numpy(scaled, counts)
+        return _aggregate_python(scaled, counts)
+
+    def display_unit(self, slot):
+        """
+        Returns the unit a slot's total is listed in.
+
+        That is the unit most of the slot's compiled lines were written in
+        (the first one seen on a tie), or the base unit if none are compiled.
+        """
+        tally = self._slot_units.get(slot)
+        if tally:
+            unit, lines = max(tally.items(), key=lambda pair: pair[1])
+            if lines > 0:
+                return unit
+        return self._slot_keys[slot][1]
+
+    def to_shopping_list(self, totals):
+        """Expands {slot ID: quantity} into {ingredient: {unit: quantity}}."""
+        shopping_list = {}
+        slot_keys = self._slot_keys
+        display = self.ingredients.display
+        for slot, qty in totals.items():
+            key, _ = slot_keys[slot]
+            name = display(key)
+            units = shopping_list.get(name)
+            if units is None:
+                units = shopping_list[name] = {}
+            unit = self.display_unit(slot)
+            units[unit] = qty / unit_size(unit)
+        return shopping_list
+
+
+def _aggregate_python(scaled, counts=None):
+    """Sums (CompiledRecipe, scaling) pairs one ingredient line at a time."""
+    totals = {}
+    for compiled, scaling in scaled:
+        for slot, qty in zip(compiled.slots, compiled.quantities):
+            totals[slot] = totals.get(slot, 0.0) + qty * scaling
+        if counts is not None:
+            for slot in compiled.slots:
+                counts[slot] = counts.get(slot, 0) + 1
+    return totals
+
+
+def _aggregate_numpy(scaled, counts=None):
+    """
+    Vectorized version of _aggregate_python.
+
+    The distinct recipes are packed into one sparse recipe x slot matrix (CSR
+    arrays), every planned entry becomes a row reference with its scaling, and
+    the scaled rows are summed per slot with np.bincount. bincount accumulates
+    in input order, so each total sees the same additions in the same order as
+    the pure Python loop and the floats come out bit-identical.
+    """
+    rows = {}
+    row_slots = []
+    row_quantities = []
+    entry_rows = []
+    scalings = []
+    for compiled, scaling in scaled:
+        row = rows.get(id(compiled))
+        if row is None:
+            row = rows[id(compiled)] = len(row_slots)
+            row_slots.append(compiled.slots)
+            row_quantities.append(compiled.quantities)
+        entry_rows.append(row)
+        scalings.append(scaling)
+
+    np = _numpy()
+    lengths = np.array([len(r) for r in row_slots], dtype=np.intp)
+    indptr = np.zeros(len(lengths) + 1, dtype=np.intp)
+    np.cumsum(lengths, out=indptr[1:])
+    slots_flat = np.concatenate([np.array(r, dtype=np.int64) for r in row_slots])
+    quantities_flat = np.concatenate(
+        [np.array(r, dtype=np.float64) for r in row_quantities]
+    )
+    if not len(slots_flat):
+        return {}
+
+    # Expand each entry into the positions of its recipe's ingredient lines
+    entry_rows = np.array(entry_rows, dtype=np.intp)
+    line_counts = lengths[entry_rows]
+    total = int(line_counts.sum())
+    entry_offsets = np.repeat(np.cumsum(line_counts) - line_counts, line_counts)
+    positions = np.repeat(indptr[entry_rows], line_counts) + (
+        np.arange(total, dtype=np.intp) - entry_offsets
+    )
+    products = quantities_flat[positions] * np.repeat(
+        np.array(scalings, dtype=np.float64), line_counts
+    )
+    entry_slots = slots_flat[positions]
+    sums = np.bincount(entry_slots, weights=products).tolist()
+
+    # Distinct recipes are packed in order of first use, so their slots are
+    # already in order of first appearance
+    order = dict.fromkeys(slots_flat.tolist())
+    if counts is not None:
+        lines = np.bincount(entry_slots).tolist()
+        counts.update((slot, lines[slot]) for slot in order)
+    return {slot: sums[slot] for slot in order}
+
+
+class ShoppingWindow:
+    """
+    Materialized shopping list totals for one date range.
+
+    Built once with RecipeIndex.aggregate, then kept current by adding or
+    subtracting single planned entries, so a meal plan edit costs
+    O(ingredients of one recipe) instead of a rescan of the range.
+    """
+
+    __slots__ = ("start", "end", "source", "version", "totals", "counts")
+
+    def __init__(self, start, end, source, version, totals, counts):
+        self.start = start  # ISO date strings, inclusive
+        self.end = end
+        self.source = source  # recipes dict the totals were computed from
+        self.version = version  # meal plan version the totals match
+        self.totals = totals
+        self.counts = counts
+
+    def covers(self, date_str):
+        return self.start <= date_str <= self.end
+
+    def add(self, pair, sign=1):
+        """Adds (sign=1) or subtracts (sign=-1) a (CompiledRecipe, scaling) pair."""
+        compiled, scaling = pair
+        totals, counts = self.totals, self.counts
+        for slot, qty in zip(compiled.slots, compiled.quantities):
+            if sign > 0:
+                totals[slot] = totals.get(slot, 0.0) + qty * scaling
+                counts[slot] = counts.get(slot, 0) + 1
+            elif counts[slot] == 1:
+                # Last contribution gone: drop the item instead of showing 0
+                del totals[slot], counts[slot]
+            else:
+                totals[slot] -= qty * scaling
+                counts[slot] -= 1
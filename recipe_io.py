@@ -0,0 +1,280 @@
+"""
+Bulk recipe import and export.
+Imports read the input one record at a time, validate and normalize the
+recipes in batches, and then save all of them with a single write of the
+recipes and one of the ingredients. Exports stream the recipes out record by
+record instead of building a whole document first.
+
+    python recipe_io.py import catalog.jsonl
+    python recipe_io.py export catalog.csv
+
+The format follows the file extension:
+
+    .jsonl / .ndjson: one {"name", "servings", "ingredients", "instructions"}
+        object per line, the same shape as a recipe in recipes.json.
+    .csv: columns name, servings, instructions, item, quantity, unit, with
+        one row per ingredient line; consecutive rows with the same name form
+        one recipe, whose servings and instructions (one step per line) are
+        read from its first row.
+"""
+
+import argparse
+import csv
+import json
+import math
+import sys
+from fractions import Fraction
+from itertools import groupby, islice
+
+import cli
+from logger import logger
+from units import canonical_unit
+
+CSV_COLUMNS = ["name", "servings", "instructions", "item", "quantity", "unit"]
+
+# Records validated and normalized at a time during an import
+BATCH_SIZE = 500
+
+
+def detect_format(path):
+    """Returns "jsonl" or "csv" for a file name, or raises ValueError."""
+    suffix = str(path).lower().rsplit(".", 1)[-1]
+    if suffix in ("jsonl", "ndjson"):
+        return "jsonl"
+    if suffix == "csv":
+        return "csv"
+    raise ValueError(f"Unknown recipe file format: {path}")
+
+
+# --- Reading ---
+
+
+def read_jsonl(f):
+    """
+    Yields (line number, record, error) for each non-blank line of a JSON Lines file.
+
+    error is a message for a line that couldn't be parsed, and record is None.
+    """
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON ({e})"
+
+
+def read_csv(f):
+    """Yields (line number, record, error) for each recipe of a CSV file."""
+    reader = csv.DictReader(f)
+    missing = {"name", "item"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+    rows = ((reader.line_num, row) for row in reader)
+    for name, group in groupby(rows, key=lambda pair: (pair[1]["name"] or "").strip()):
+        group = list(group)
+        line_no, first = group[0]
+        record = {
+            "name": name,
+            "servings": first.get("servings") or 1,
+            "instructions": (first.get("instructions") or "").splitlines(),
+            "ingredients": [
+                {
+                    "item": row["item"],
+                    "quantity": row.get("quantity"),
+                    "unit": row.get("unit") or "",
+                }
+                for _, row in group
+                if (row["item"] or "").strip()
+            ],
+        }
+        yield line_no, record, None
+
+
+READERS = {"jsonl": read_jsonl, "csv": read_csv}
+
+
+# --- Validation ---
+
+
+def _number(value, what, allow_zero=False):
+    """
+    Parses a quantity, keeping whole numbers as ints.
+
+    Accepts numbers and strings such as "2", "0.5", "1/2" or "1 1/2".
+
+    Raises:
+        ValueError: If the value isn't a number, or is negative (or zero,
+            unless allow_zero is set).
+    """
+    try:
+        if isinstance(value, str):
+            parts = value.split()
+            if not parts:
+                raise ValueError
+            number = float(sum(Fraction(part) for part in parts))
+        else:
+            number = float(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        raise ValueError(f"{what} is not a number: {value!r}") from None
+    if not math.isfinite(number):
+        raise ValueError(f"{what} is not a number: {value!r}")
+    if number < 0 or not (number > 0 or allow_zero):
+        raise ValueError(f"{what} must be positive: {value!r}")
+    return int(number) if number.is_integer() else number
+
+
+def normalize_recipe(record):
+    """
+    Validates one imported record and puts it in the form add_recipe stores.
+
+    Names and ingredient items are lowercased with whitespace collapsed,
+    quantities become numbers (fractions like "1/2" are accepted), units
+    their standard spelling (see units), and instruction steps are stripped,
+    dropping empty ones.
+
+    Returns:
+        tuple: (name, {"ingredients", "instructions", "servings"}).
+
+    Raises:
+        ValueError: If a required field is missing or malformed.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    name = " ".join(str(record.get("name") or "").lower().split())
+    if not name:
+        raise ValueError("missing recipe name")
+
+    ingredients = []
+    for ing in record.get("ingredients") or []:
+        if not isinstance(ing, dict):
+            raise ValueError(f"{name}: ingredient is not an object")
+        item = " ".join(str(ing.get("item") or "").lower().split())
+        if not item:
+            raise ValueError(f"{name}: ingredient without an item")
+        ingredients.append(
+            {
+                "item": item,
+                # A zero quantity is how recipes say "to taste" or "for dusting"
+                "quantity": _number(
+                    ing.get("quantity"), f"{name}: {item} quantity", allow_zero=True
+                ),
+                "unit": canonical_unit(str(ing.get("unit") or "")),
+            }
+        )
+
+    instructions = record.get("instructions") or []
+    if isinstance(instructions, str):
+        instructions = instructions.splitlines()
+    instructions = [str(step).strip() for step in instructions if str(step).strip()]
+
+    servings = _number(record.get("servings", 1), f"{name}: servings")
+    return name, {
+        "ingredients": ingredients,
+        "instructions": instructions,
+        "servings": servings,
+    }
+
+
+def import_recipes(path, fmt=None, batch_size=BATCH_SIZE):
+    """
+    Imports every valid recipe from a JSON Lines or CSV file.
+
+    Invalid records are skipped and reported; a recipe that is already
+    stored, or appears again later in the file, is replaced. Nothing is
+    saved until the whole file has been read.
+
+    Args:
+        path: The file to read.
+        fmt (str): "jsonl" or "csv"; detected from the file name if None.
+        batch_size (int): Records validated at a time.
+
+    Returns:
+        tuple: (number of recipes imported, list of error messages).
+    """
+    read = READERS[fmt or detect_format(path)]
+    recipes = {}
+    errors = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        records = read(f)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            for line_no, record, error in batch:
+                if error is None:
+                    try:
+                        name, recipe = normalize_recipe(record)
+                    except ValueError as e:
+                        error = str(e)
+                    else:
+                        recipes[name] = recipe
+                        continue
+                errors.append(f"line {line_no}: {error}")
+            logger.debug(f"validated {len(recipes)} recipes from {path}")
+
+    cli.add_recipes(recipes)
+    logger.info(f"imported {len(recipes)} recipes from {path}, {len(errors)} errors")
+    return len(recipes), errors
+
+
+# --- Writing ---
+
+
+def write_jsonl(f, recipes):
+    """Writes (name, recipe) pairs as JSON Lines."""
+    for name, recipe in recipes:
+        f.write(json.dumps({"name": name, **recipe}) + "\n")
+
+
+def write_csv(f, recipes):
+    """Writes (name, recipe) pairs as CSV, one row per ingredient line."""
+    writer = csv.writer(f)
+    writer.writerow(CSV_COLUMNS)
+    for name, recipe in recipes:
+        servings = recipe.get("servings", 1)
+        instructions = "\n".join(recipe.get("instructions", []))
+        lines = recipe.get("ingredients") or [{"item": "", "quantity": "", "unit": ""}]
+        for i, ing in enumerate(lines):
+            head = [name, servings, instructions] if i == 0 else [name, "", ""]
+            writer.writerow(head + [ing["item"], ing["quantity"], ing["unit"]])
+
+
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv}
+
+
+def export_recipes(path, fmt=None):
+    """
+    Writes every recipe to a JSON Lines or CSV file, sorted by name.
+
+    Returns:
+        int: Number of recipes written.
+    """
+    write = WRITERS[fmt or detect_format(path)]
+    recipes = cli.get_all_recipes()
+    names = sorted(recipes)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        write(f, ((name, recipes[name]) for name in names))
+    return len(names)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export recipes in bulk.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", help="a .jsonl or .csv file")
+    parser.add_argument("--format", choices=sorted(READERS), help="override the format")
+    args = parser.parse_args(argv)
+
+    if args.action == "import":
+        count, errors = import_recipes(args.path, args.format)
+        for error in errors:
+            print(error, file=sys.stderr)
+        print(f"Imported {count} recipes ({len(errors)} skipped)")
+        return 1 if errors else 0
+    count = export_recipes(args.path, args.format)
+    print(f"Exported {count} recipes to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Fuzzy recipe name search.
+RecipeSearchIndex returns exactly what difflib.get_close_matches would return
+for the indexed names, but without scoring every name against the query.
+
+Every name's character counts are kept in an inverted index. For a query they
+give each name's difflib quick_ratio(), which is an upper bound of its
+ratio(). Names are then scored best bound first, and the search stops as soon
+as no remaining bound can beat the results found so far.
+
+The index also answers plain substring filters from a trigram index, and keeps
+the names sorted for listing.
+"""
+
+import heapq
+from bisect import bisect_left
+from collections import Counter
+
+from ingredient_index import insort_unique
+
+
+def _trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class RecipeSearchIndex:
+    """Fuzzy search over a set of names, updated as names are added and removed."""
+
+    def __init__(self, names=()):
+        self._names = set()
+        self._source = None
+        # {character: [names containing it at least once, at least twice, ...]},
+        # each level a dict used as an insertion-ordered set
+        self._postings = {}
+        self._sorted = []
+        # {trigram of the lowercased name: set of names}
+        self._trigrams = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def sync(self, recipes):
+        """Brings the index in line with a {name: recipe} dict."""
+        if recipes is self._source and len(recipes) == len(self._names):
+            return
+        self._source = recipes
+        current = recipes.keys()
+        for name in self._names - current:
+            self.discard(name)
+        for name in current - self._names:
+            self.add(name)
+
+    def add(self, name):
+        if name in self._names:
+            return
+        self._names.add(name)
+        for char, count in Counter(name).items():
+            levels = self._postings.setdefault(char, [])
+            while len(levels) < count:
+                levels.append({})
+            for level in levels[:count]:
+                level[name] = None
+        insort_unique(self._sorted, name)
+        for gram in _trigrams(name.lower()):
+            self._trigrams.setdefault(gram, set()).add(name)
+
+    def discard(self, name):
+        if name not in self._names:
+            return
+        self._names.discard(name)
+        for char, count in Counter(name).items():
+            levels = self._postings[char]
+            for level in levels[:count]:
+                del level[name]
+            while levels and not levels[-1]:
+                levels.pop()
+            if not levels:
+                del self._postings[char]
+        del self._sorted[bisect_left(self._sorted, name)]
+        for gram in _trigrams(name.lower()):
+            names = self._trigrams[gram]
+            names.discard(name)
+            if not names:
+                del self._trigrams[gram]
+
+    def containing(self, text):
+        """
+        Returns the names that contain text, ignoring case, in sorted order.
+
+        Only names holding every trigram of text are checked, so a filter of
+        three or more characters doesn't scan all names.
+        """
+        text = text.lower()
+        grams = _trigrams(text)
+        if not grams:
+            return [name for name in self._sorted if text in name.lower()]
+        postings = sorted((self._trigrams.get(gram, set()) for gram in grams), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return sorted(name for name in candidates if text in name.lower())
+
+    def search(self, word, n=3, cutoff=0.6):
+        """
+        Returns the best "good enough" matches for word.
+
+        Same arguments and results as difflib.get_close_matches(word, names,
+        n, cutoff): at most n names whose similarity ratio is at least cutoff,
+        best first.
+        """
+        # Imported here so that loading the index doesn't pay for difflib
+        from difflib import SequenceMatcher, get_close_matches
+
+        if not n > 0:
+            raise ValueError(f"n must be > 0: {n!r}")
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError(f"cutoff must be in [0.0, 1.0]: {cutoff!r}")
+        if cutoff <= 0.0 or not word:
+            # Every name qualifies, so there is nothing to prune
+            return get_close_matches(word, self._names, n, cutoff)
+
+        # Characters word shares with each name (the quick_ratio numerator).
+        # min(wanted, count) for a character is the number of its first
+        # `wanted` levels that hold the name, so Counter can do the counting.
+        shared = Counter()
+        for char, wanted in Counter(word).items():
+            for level in self._postings.get(char, ())[:wanted]:
+                shared.update(level.keys())
+
+        # Computed like difflib's ratios, so the bound compares exactly
+        length = len(word)
+        candidates = []
+        for name, matches in shared.items():
+            bound = 2.0 * matches / (len(name) + length)
+            if bound >= cutoff:
+                candidates.append((bound, name))
+        candidates.sort(reverse=True)
+
+        s = SequenceMatcher()
+        s.set_seq2(word)
+        best = []  # min-heap of the n best (ratio, name) pairs so far
+        for bound, name in candidates:
+            if len(best) == n and bound < best[0][0]:
+                break
+            s.set_seq1(name)
+            ratio = s.ratio()
+            if ratio >= cutoff:
+                if len(best) < n:
+                    heapq.heappush(best, (ratio, name))
+                else:
+                    heapq.heappushpop(best, (ratio, name))
+        return [name for ratio, name in sorted(best, reverse=True)]
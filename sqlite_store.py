@@ -0,0 +1,561 @@
+"""
+SQLite storage backend for the Meal Planner application.
+Stores recipes, their ingredient lines, known ingredients and meal plan entries
+in indexed tables, so a single edit only touches the rows it changes instead of
+rewriting a whole JSON file.
+
+Enabled by setting the environment variable MEALPLANNER_BACKEND=sqlite. On first
+use the new database is populated from the existing JSON files, once; the meta
+table records that this happened. The meal plan schema version is kept in
+SQLite's user_version.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import timedelta
+
+import storage
+from logger import logger
+from models import MEAL_PLAN_SCHEMA_VERSION, MealEntry
+
+DB_FILE = "mealplanner.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    servings,
+    instructions TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recipe_ingredients (
+    recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    quantity,
+    unit TEXT,
+    PRIMARY KEY (recipe_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_item ON recipe_ingredients(item);
+CREATE TABLE IF NOT EXISTS ingredients (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meal_plan_entries (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    meal_type TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    recipe TEXT NOT NULL,
+    servings
+);
+CREATE INDEX IF NOT EXISTS idx_meal_plan_slot
+    ON meal_plan_entries(date, meal_type, position);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_conn = None
+_lock = threading.RLock()
+
+# Recipes dict cache, valid while no write happened through any connection
+_recipes_cache = None
+_recipes_cache_version = None
+
+# Number of meal plan writes made through this connection
+_plan_changes = 0
+
+# Number of open _Transactions; nested ones run as savepoints
+_depth = 0
+
+
+def _connect():
+    """Opens the database on first use, creating and populating it if needed."""
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(
+            storage.BASE_DIR / DB_FILE, check_same_thread=False, isolation_level=None
+        )
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+        _conn = conn
+        _upgrade_schema(conn)
+        _import_once(conn)
+    return _conn
+
+
+def _import_once(conn):
+    """
+    Populates a new database from the JSON files.
+
+    The import is recorded in the meta table, so a database whose recipes
+    were all deleted later isn't populated again.
+    """
+    marker = "SELECT 1 FROM meta WHERE key = 'json_imported'"
+    if conn.execute(marker).fetchone():
+        return
+    with _Transaction():
+        # Checked again under the write lock, in case another process just
+        # imported
+        if conn.execute(marker).fetchone():
+            return
+        # Databases from before the marker existed were populated on first
+        # use, so any data in them means the import already ran
+        has_data = conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM recipes)"
+            " OR EXISTS (SELECT 1 FROM ingredients)"
+            " OR EXISTS (SELECT 1 FROM meal_plan_entries)"
+        ).fetchone()[0]
+        if not has_data:
+            import_json_data()
+        conn.execute("INSERT INTO meta(key, value) VALUES ('json_imported', '1')")
+
+
+def _upgrade_schema(conn):
+    """Brings the meal plan tables up to MEAL_PLAN_SCHEMA_VERSION."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version > MEAL_PLAN_SCHEMA_VERSION:
+        raise ValueError(
+            f"{DB_FILE} schema version {version} is newer than this app "
+            f"supports ({MEAL_PLAN_SCHEMA_VERSION})"
+        )
+    if version == MEAL_PLAN_SCHEMA_VERSION:
+        return
+    with _Transaction():
+        if version < 2:
+            # Version 1 stored bare recipe names with NULL servings, meaning
+            # the recipe's own servings
+            conn.execute(
+                "UPDATE meal_plan_entries SET servings = COALESCE("
+                "(SELECT servings FROM recipes WHERE recipes.name ="
+                " meal_plan_entries.recipe), 1) WHERE servings IS NULL"
+            )
+        # Version 3 only changed how the JSON backend lays out its files;
+        # date range queries here already use idx_meal_plan_slot
+        conn.execute(f"PRAGMA user_version = {MEAL_PLAN_SCHEMA_VERSION}")
+    logger.info(f"upgraded {DB_FILE} to schema version {MEAL_PLAN_SCHEMA_VERSION}")
+
+
+class _Transaction:
+    """
+    Context manager running the enclosed statements in one write transaction.
+
+    A _Transaction opened inside another one becomes a savepoint, so it can
+    roll back on its own but only commits with the outermost transaction.
+    """
+
+    plan_write = False
+
+    def __enter__(self):
+        global _depth
+        _lock.acquire()
+        try:
+            self.conn = _connect()
+            if _depth == 0:
+                self.conn.execute("BEGIN IMMEDIATE")
+            else:
+                self.conn.execute("SAVEPOINT nested")
+        except BaseException:
+            _lock.release()
+            raise
+        _depth += 1
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        global _recipes_cache, _plan_changes, _depth
+        _depth -= 1
+        try:
+            if _depth == 0:
+                self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+            elif exc_type is None:
+                self.conn.execute("RELEASE nested")
+            else:
+                self.conn.execute("ROLLBACK TO nested")
+                self.conn.execute("RELEASE nested")
+        finally:
+            # A rolled back outer transaction may undo plan writes that were
+            # already counted, so it counts as a change too
+            if self.plan_write or (_depth == 0 and exc_type is not None):
+                _plan_changes += 1
+            if not self.plan_write:
+                _recipes_cache = None
+            _lock.release()
+        return False
+
+
+class _PlanTransaction(_Transaction):
+    """A _Transaction that changes the meal plan."""
+
+    plan_write = True
+
+
+def _data_version(conn):
+    """Returns SQLite's counter of commits made by other connections."""
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def import_json_data():
+    """Copies recipes, ingredients and the meal plan from the JSON files."""
+    import json_store
+
+    recipes = json_store.get_all_recipes()
+    plan = json_store.get_meal_plan()
+    ingredients = json_store.get_all_ingredients()
+    logger.info(f"importing {len(recipes)} recipes into {DB_FILE}")
+
+    with _Transaction() as conn:
+        for name, data in recipes.items():
+            _write_recipe(conn, name, data)
+        conn.executemany(
+            "INSERT OR IGNORE INTO ingredients(name) VALUES (?)",
+            ((name,) for name in ingredients),
+        )
+        for date_str, day_plan in plan.items():
+            for meal_type, items in day_plan.items():
+                for position, entry in enumerate(items):
+                    _insert_entry(conn, date_str, meal_type, position, entry)
+
+
+def _write_recipe(conn, name, data):
+    """Inserts or replaces a recipe and its ingredient lines."""
+    row = conn.execute("SELECT id FROM recipes WHERE name = ?", (name,)).fetchone()
+    instructions = json.dumps(data.get("instructions", []))
+    if row:
+        recipe_id = row[0]
+        conn.execute(
+            "UPDATE recipes SET servings = ?, instructions = ? WHERE id = ?",
+            (data.get("servings"), instructions, recipe_id),
+        )
+        conn.execute(
+            "DELETE FROM recipe_ingredients WHERE recipe_id = ?", (recipe_id,)
+        )
+    else:
+        recipe_id = conn.execute(
+            "INSERT INTO recipes(name, servings, instructions) VALUES (?, ?, ?)",
+            (name, data.get("servings"), instructions),
+        ).lastrowid
+    conn.executemany(
+        "INSERT INTO recipe_ingredients(recipe_id, position, item, quantity, unit)"
+        " VALUES (?, ?, ?, ?, ?)",
+        (
+            (recipe_id, position, ing["item"], ing["quantity"], ing["unit"])
+            for position, ing in enumerate(data.get("ingredients", []))
+        ),
+    )
+
+
+def _insert_entry(conn, date_str, meal_type, position, entry):
+    """Inserts one MealEntry."""
+    conn.execute(
+        "INSERT INTO meal_plan_entries(date, meal_type, position, recipe, servings)"
+        " VALUES (?, ?, ?, ?, ?)",
+        (date_str, meal_type, position, entry.recipe, entry.servings),
+    )
+
+
+def _slot_ids(conn, date_str, meal_type):
+    """Returns the row ids of a meal slot, ordered by position."""
+    rows = conn.execute(
+        "SELECT id FROM meal_plan_entries WHERE date = ? AND meal_type = ?"
+        " ORDER BY position",
+        (date_str, meal_type),
+    )
+    return [row[0] for row in rows]
+
+
+def _check_expected(conn, entry_id, expected_recipe):
+    """
+    Optimistic concurrency check for index-based edits.
+
+    Returns:
+        bool: False if the entry is no longer expected_recipe, which means the
+        caller's view of the slot is out of date.
+    """
+    if expected_recipe is None:
+        return True
+    row = conn.execute(
+        "SELECT recipe FROM meal_plan_entries WHERE id = ?", (entry_id,)
+    ).fetchone()
+    return row[0] == expected_recipe
+
+
+def _renumber_slot(conn, ids):
+    """Rewrites the positions of a slot after an entry was removed."""
+    conn.executemany(
+        "UPDATE meal_plan_entries SET position = ? WHERE id = ?",
+        ((position, entry_id) for position, entry_id in enumerate(ids)),
+    )
+
+
+# --- Backend API ---
+
+
+def batch():
+    """Runs the backend calls made in the block in one transaction."""
+    return _Transaction()
+
+
+def get_all_recipes():
+    """Retrieves all recipes as a {name: recipe} dict."""
+    global _recipes_cache, _recipes_cache_version
+    with _lock:
+        conn = _connect()
+        version = _data_version(conn)
+        if _recipes_cache is not None and _recipes_cache_version == version:
+            return _recipes_cache
+
+        recipes = {}
+        ids = {}
+        for recipe_id, name, servings, instructions in conn.execute(
+            "SELECT id, name, servings, instructions FROM recipes ORDER BY id"
+        ):
+            recipe = {"ingredients": [], "instructions": json.loads(instructions)}
+            if servings is not None:
+                recipe["servings"] = servings
+            recipes[name] = recipe
+            ids[recipe_id] = recipe
+        for recipe_id, item, quantity, unit in conn.execute(
+            "SELECT recipe_id, item, quantity, unit FROM recipe_ingredients"
+            " ORDER BY recipe_id, position"
+        ):
+            ids[recipe_id]["ingredients"].append(
+                {"item": item, "quantity": quantity, "unit": unit}
+            )
+
+        _recipes_cache, _recipes_cache_version = recipes, version
+        return recipes
+
+
+def get_all_ingredients():
+    """Retrieves the sorted list of known ingredients."""
+    with _lock:
+        rows = _connect().execute("SELECT name FROM ingredients ORDER BY name")
+        return [row[0] for row in rows]
+
+
+def save_ingredients(names):
+    """Saves new ingredients to the database if they don't exist."""
+    with _Transaction() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO ingredients(name) VALUES (?)",
+            ((name,) for name in names),
+        )
+
+
+def add_recipe(name, ingredients, instructions, servings=1):
+    """Adds a new recipe or updates an existing one, then saves to storage."""
+    recipe = {
+        "ingredients": ingredients,
+        "instructions": instructions,
+        "servings": servings,
+    }
+    with _Transaction() as conn:
+        _write_recipe(conn, name, recipe)
+        conn.executemany(
+            "INSERT OR IGNORE INTO ingredients(name) VALUES (?)",
+            ((ing["item"],) for ing in ingredients),
+        )
+
+
+def add_recipes(recipes):
+    """
+    Adds or updates many recipes in one transaction.
+
+    Args:
+        recipes (dict): {name: {"ingredients", "instructions", "servings"}}.
+    """
+    with _Transaction() as conn:
+        for name, recipe in recipes.items():
+            _write_recipe(conn, name, recipe)
+        conn.executemany(
+            "INSERT OR IGNORE INTO ingredients(name) VALUES (?)",
+            (
+                (ing["item"],)
+                for recipe in recipes.values()
+                for ing in recipe["ingredients"]
+            ),
+        )
+
+
+def delete_recipe(name):
+    """Deletes a recipe by name if it exists."""
+    with _Transaction() as conn:
+        cur = conn.execute("DELETE FROM recipes WHERE name = ?", (name,))
+        return cur.rowcount > 0
+
+
+def get_meal_plan():
+    """Retrieves the whole meal plan as {date: {meal_type: [MealEntry]}}."""
+    with _lock:
+        rows = _connect().execute(
+            "SELECT date, meal_type, recipe, servings FROM meal_plan_entries"
+            " ORDER BY date, meal_type, position"
+        )
+        return _rows_to_plan(rows)
+
+
+def get_meal_plan_version():
+    """
+    Returns a token that changes whenever the meal plan changes.
+
+    The first part is SQLite's data_version, which moves on commits from other
+    connections; the second counts plan writes made through this one.
+    """
+    with _lock:
+        return (_data_version(_connect()), _plan_changes)
+
+
+def get_meal_plan_range(start_date, days):
+    """Returns the planned days between start_date and start_date + days."""
+    end_date = start_date + timedelta(days=days - 1)
+    with _lock:
+        rows = _connect().execute(
+            "SELECT date, meal_type, recipe, servings FROM meal_plan_entries"
+            " WHERE date BETWEEN ? AND ? ORDER BY date, meal_type, position",
+            (start_date.isoformat(), end_date.isoformat()),
+        )
+        return _rows_to_plan(rows)
+
+
+def _rows_to_plan(rows):
+    """Groups (date, meal_type, recipe, servings) rows into the plan structure."""
+    plan = {}
+    for date_str, meal_type, recipe, servings in rows:
+        plan.setdefault(date_str, {}).setdefault(meal_type, []).append(
+            MealEntry(recipe, servings)
+        )
+    return plan
+
+
+def update_meal_plan(date_str, meal_type, recipe_name, servings=1):
+    """Adds a recipe to the meal plan for a specific date and meal type."""
+    with _PlanTransaction() as conn:
+        position = len(_slot_ids(conn, date_str, meal_type))
+        _insert_entry(
+            conn,
+            date_str,
+            meal_type,
+            position,
+            MealEntry(recipe_name, servings),
+        )
+
+
+def remove_from_meal_plan(date_str, meal_type, index, expected_recipe=None):
+    """Removes a recipe from the meal plan at the specified index."""
+    with _PlanTransaction() as conn:
+        ids = _slot_ids(conn, date_str, meal_type)
+        try:
+            entry_id = ids.pop(index)
+        except IndexError:
+            return False
+        if not _check_expected(conn, entry_id, expected_recipe):
+            return False
+        conn.execute("DELETE FROM meal_plan_entries WHERE id = ?", (entry_id,))
+        _renumber_slot(conn, ids)
+        return True
+
+
+def update_meal_plan_entry_servings(
+    date_str, meal_type, index, servings, expected_recipe=None
+):
+    """Updates the servings for a specific meal plan entry."""
+    with _PlanTransaction() as conn:
+        ids = _slot_ids(conn, date_str, meal_type)
+        try:
+            entry_id = ids[index]
+        except IndexError:
+            return False
+        if not _check_expected(conn, entry_id, expected_recipe):
+            return False
+        conn.execute(
+            "UPDATE meal_plan_entries SET servings = ? WHERE id = ?",
+            (servings, entry_id),
+        )
+        return True
+
+
+def move_meal_plan_entry(
+    src_date, src_meal, src_index, dest_date, dest_meal, expected_recipe=None
+):
+    """Moves a meal plan entry from one slot to another."""
+    with _PlanTransaction() as conn:
+        ids = _slot_ids(conn, src_date, src_meal)
+        try:
+            entry_id = ids.pop(src_index)
+        except IndexError:
+            return False
+        if not _check_expected(conn, entry_id, expected_recipe):
+            return False
+        _renumber_slot(conn, ids)
+        position = len(_slot_ids(conn, dest_date, dest_meal))
+        conn.execute(
+            "UPDATE meal_plan_entries SET date = ?, meal_type = ?, position = ?"
+            " WHERE id = ?",
+            (dest_date, dest_meal, position, entry_id),
+        )
+        return True
+
+
+def clear_meal_plan(date_str, meal_type=None):
+    """
+    Clears a whole day, or a single meal of that day, from the meal plan.
+
+    Returns:
+        bool: True if anything was removed.
+    """
+    with _PlanTransaction() as conn:
+        if meal_type is None:
+            cur = conn.execute(
+                "DELETE FROM meal_plan_entries WHERE date = ?", (date_str,)
+            )
+        else:
+            cur = conn.execute(
+                "DELETE FROM meal_plan_entries WHERE date = ? AND meal_type = ?",
+                (date_str, meal_type),
+            )
+        return cur.rowcount > 0
+
+
+def apply_meal_plan_edits(edits):
+    """
+    Applies a list of meal plan edit records in one transaction.
+
+    The records use the JSON backend's journal format ("add", "remove",
+    "servings", "move" and "clear" ops) and are applied in order.
+
+    Returns:
+        bool: True if the plan changed.
+    """
+    changed = False
+    with _PlanTransaction():
+        for edit in edits:
+            op = edit["op"]
+            if op == "add":
+                entry = MealEntry.from_json(edit["entry"])
+                update_meal_plan(
+                    edit["date"], edit["meal"], entry.recipe, entry.servings
+                )
+                changed = True
+            elif op == "remove":
+                changed |= remove_from_meal_plan(
+                    edit["date"], edit["meal"], edit["index"], edit.get("expected")
+                )
+            elif op == "servings":
+                changed |= update_meal_plan_entry_servings(
+                    edit["date"],
+                    edit["meal"],
+                    edit["index"],
+                    edit["servings"],
+                    edit.get("expected"),
+                )
+            elif op == "move":
+                changed |= move_meal_plan_entry(
+                    *edit["src"], *edit["dest"], edit.get("expected")
+                )
+            elif op == "clear":
+                changed |= clear_meal_plan(edit["date"], edit.get("meal"))
+            else:
+                raise ValueError(f"Unknown meal plan operation: {op}")
+    return changed
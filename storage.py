@@ -0,0 +1,586 @@
+"""
+Storage layer for the Meal Planner application.
+Reads and writes the JSON data files and keeps their parsed contents in memory,
+so repeated backend calls only re-parse a file after it has changed on disk.
+
+Files are always replaced atomically (temp file + fsync + rename), so a crash
+or a concurrent reader never sees a half-written document. Writers to the same
+file are serialized with a StoreLock, across threads and processes. Frequently edited
+documents can be wrapped in a JournaledFile, which records small edits in an
+append-only journal and folds them back into the document in the background;
+edits made in a JournaledFile.batch() block share a single journal write.
+
+Parsing a large pretty-printed JSON file is the slowest part of a cold start,
+so read_json also keeps a compact pickle snapshot of each file it parses
+('<file>.snap', next to it). The snapshot is used while it matches the JSON
+file's mtime and size, and rebuilt on the next read after the JSON changes;
+the JSON stays the human-editable format. Set MEALPLANNER_SNAPSHOTS=0 to turn
+snapshots off.
+"""
+
+import gc
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import metrics
+from logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Where the data files live: next to the code unless MEALPLANNER_DATA_DIR is set
+BASE_DIR = Path(
+    os.environ.get("MEALPLANNER_DATA_DIR") or Path(__file__).resolve().parent
+)
+
+# Parsed file cache: {absolute path: ((mtime_ns, size), data)}
+_cache = {}
+
+SNAPSHOTS = os.environ.get("MEALPLANNER_SNAPSHOTS", "1") != "0"
+
+# Bumped whenever the snapshot layout changes, so old snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+
+
+def _signature(path):
+    """Returns the (mtime, size) pair used to detect changes to a file."""
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _optional_signature(path):
+    """Like _signature, but returns None for a missing file."""
+    try:
+        return _signature(path)
+    except FileNotFoundError:
+        return None
+
+
+def _count_bytes(direction, path, size):
+    """Records I/O on a data file; month files are counted under their directory."""
+    if metrics.ENABLED:
+        file = path.name if path.parent == BASE_DIR else path.parent.name
+        metrics.count_bytes(direction, file, size)
+
+
+def _fsync_dir(path):
+    """Flushes a directory entry change (such as a rename) to disk."""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, raw):
+    """Replaces the file at path with the given bytes, all or nothing."""
+    # Imported by the writers only, as it adds to every process's start time
+    import tempfile
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _count_bytes("written", path, len(raw))
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+
+
+def encode_json(data):
+    """Serializes data the way every JSON file in the app is formatted."""
+    return json.dumps(data, indent=4).encode("utf-8")
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pauses the cyclic garbage collector for the block.
+
+    Parsing a large file creates millions of dicts and lists, none of them
+    garbage; letting the collector scan them again and again as they are
+    allocated costs about as much as the parse itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def snapshot_path(path):
+    """Returns where the snapshot of a JSON file is kept."""
+    return path.with_name(f"{path.name}.snap")
+
+
+def _read_snapshot(path, signature):
+    """Returns the data in path's snapshot, or None if it is missing or stale."""
+    import pickle
+
+    try:
+        with open(snapshot_path(path), "rb") as f, _gc_paused():
+            version, source, data = pickle.load(f)
+            _count_bytes("read", snapshot_path(path), f.tell())
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # A torn or foreign snapshot is just rebuilt from the JSON
+        logger.warning(f"ignoring unreadable snapshot of {path.name}")
+        return None
+    if version != SNAPSHOT_VERSION or tuple(source) != signature:
+        return None
+    return data
+
+
+def _write_snapshot(path, signature, data):
+    """
+    Saves a snapshot of path's parsed data, taken when it had the given signature.
+
+    Snapshots are only a cache of the JSON, so they are replaced atomically
+    but not fsynced, and a failure to write one is logged and ignored.
+    """
+    import pickle
+    import tempfile
+
+    target = snapshot_path(path)
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{target.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((SNAPSHOT_VERSION, signature, data), f, protocol=5)
+                _count_bytes("written", target, f.tell())
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"could not write snapshot of {path.name}: {e}")
+
+
+def read_json(path, signature=None):
+    """
+    Parses a JSON file, using its snapshot when that is up to date.
+
+    Args:
+        path (Path): The JSON file.
+        signature: The file's _signature(), if the caller already has it.
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist.
+    """
+    if not SNAPSHOTS:
+        raw = path.read_bytes()
+        _count_bytes("read", path, len(raw))
+        with _gc_paused():
+            return json.loads(raw)
+    if signature is None:
+        signature = _signature(path)
+    data = _read_snapshot(path, signature)
+    if data is None:
+        raw = path.read_bytes()
+        _count_bytes("read", path, len(raw))
+        with _gc_paused():
+            data = json.loads(raw)
+        # Only snapshot what was read, so a file replaced meanwhile can't
+        # pair its signature with the old content
+        if _optional_signature(path) == signature:
+            _write_snapshot(path, signature, data)
+    return data
+
+
+class StoreLock:
+    """
+    Serializes writers of one data file across threads and processes.
+
+    Reentrant within a thread. The cross-process lock is an OS file lock on
+    '<file>.lock' next to the data file, taken only by the outermost holder.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._lock_file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._lock_file = self._acquire_file_lock()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth == 0:
+            lock_file, self._lock_file = self._lock_file, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                lock_file.close()
+        self._thread_lock.release()
+        return False
+
+    def _acquire_file_lock(self):
+        lock_file = open(BASE_DIR / f"{self.file_path}.lock", "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue  # LK_LOCK gives up after ~10 seconds
+        except BaseException:
+            lock_file.close()
+            raise
+        return lock_file
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def lock_for(file_path):
+    """Returns the process-wide StoreLock guarding writes to file_path."""
+    with _locks_guard:
+        lock = _locks.get(file_path)
+        if lock is None:
+            lock = _locks[file_path] = StoreLock(file_path)
+        return lock
+
+
+@metrics.timed
+def load_data(file_path):
+    """
+    Load JSON data from the given file path.
+
+    The parsed data is cached and shared between callers until the file's
+    mtime or size changes. Treat it as read-only unless it is passed back
+    to save_data.
+    """
+    path = BASE_DIR / file_path
+    try:
+        signature = _signature(path)
+    except FileNotFoundError:
+        _cache.pop(path, None)
+        raise FileNotFoundError(f"File not found: {path}") from None
+
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    data = read_json(path, signature)
+    _cache[path] = (signature, data)
+    return data
+
+
+@metrics.timed
+def save_data(file_path, data):
+    """Atomically save JSON data to the given file path and refresh its cache entry."""
+    path = BASE_DIR / file_path
+    try:
+        atomic_write(path, encode_json(data))
+    except BaseException:
+        # The cached object may already hold the unsaved changes
+        _cache.pop(path, None)
+        raise
+    _cache[path] = (_signature(path), data)
+
+
+def invalidate_cache(file_path=None):
+    """Drops the cached data for one file, or for every file if none is given."""
+    if file_path is None:
+        _cache.clear()
+    else:
+        _cache.pop(BASE_DIR / file_path, None)
+
+
+def _digest(raw):
+    """Returns the digest that ties a journal to the document it applies to."""
+    import hashlib
+
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+class JournaledFile:
+    """
+    A JSON document whose edits are appended to a journal file.
+
+    Each edit is a small JSON record. apply_record(data, record) applies it to
+    the in-memory document and returns True if anything changed; only changed
+    records are written to the journal. Once the journal holds compact_after
+    records, a background thread rewrites the document and starts a new journal.
+
+    decode(obj) turns the parsed file into the in-memory document and returns
+    (document, upgraded); an upgraded document (e.g. migrated from an older
+    format) is written back right away. encode(document) does the reverse.
+
+    The journal's first line stores a digest of the document it was written
+    against. A journal whose digest doesn't match the document on disk (for
+    example after a crash mid-compaction, or a manual edit of the document)
+    is stale and is ignored.
+    """
+
+    def __init__(
+        self,
+        file_path,
+        apply_record,
+        default=dict,
+        compact_after=200,
+        decode=None,
+        encode=None,
+    ):
+        self.file_path = file_path
+        self.apply_record = apply_record
+        self.default = default
+        self.compact_after = compact_after
+        self.decode = decode
+        self.encode = encode
+        self.lock = lock_for(file_path)
+        self._data = None
+        self._signature = None
+        self._digest = None
+        self._records = 0
+        self._compacting = False
+        self._reloads = 0
+        self._changes = 0
+        self._pending = None  # records applied in a batch(), not yet journaled
+
+    @property
+    def path(self):
+        return BASE_DIR / self.file_path
+
+    @property
+    def journal_path(self):
+        return self.path.with_suffix(".journal")
+
+    def _current_signature(self):
+        return (
+            _optional_signature(self.path),
+            _optional_signature(self.journal_path),
+        )
+
+    def load(self):
+        """Returns the document with all journaled edits applied."""
+        if self._data is not None and self._current_signature() == self._signature:
+            return self._data
+        # Reload under the store lock so a writer's in-progress journal
+        # append is never mistaken for a torn record
+        with self.lock:
+            signature = self._current_signature()
+            if self._data is not None and signature == self._signature:
+                return self._data
+
+            upgraded = False
+            try:
+                raw = self.path.read_bytes()
+                _count_bytes("read", self.path, len(raw))
+                data = json.loads(raw)
+                if self.decode is not None:
+                    data, upgraded = self.decode(data)
+            except FileNotFoundError:
+                raw = b""
+                data = self.default()
+            digest = _digest(raw)
+
+            records, truncated = self._read_journal(digest)
+            for record in records:
+                self.apply_record(data, record)
+
+            self._data, self._signature = data, signature
+            self._digest, self._records = digest, len(records)
+            self._reloads += 1
+            if truncated or upgraded:
+                # Fold the intact records in now so later appends don't
+                # land behind a torn line, or persist the upgrade
+                self.compact(force=True)
+            return self._data
+
+    def _read_journal(self, digest):
+        """
+        Reads the journal records that apply to the document with the given digest.
+
+        Returns:
+            tuple: (records, truncated) where truncated is True if the journal
+            ended in a partially written record.
+        """
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return [], False
+        _count_bytes("read", self.journal_path, len(text))
+        lines = text.splitlines()
+        if not lines:
+            return [], False
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            header = {}
+        if header.get("digest") != digest:
+            logger.info(f"ignoring stale journal {self.journal_path.name}")
+            return [], False
+
+        records = []
+        for line in lines[1:]:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn final write from a crash; everything before it is intact
+                logger.warning(f"truncated record in {self.journal_path.name}")
+                return records, True
+        return records, False
+
+    def apply(self, record):
+        """
+        Applies an edit record and makes it durable with a journal append.
+
+        Returns:
+            bool: Whether the record changed the document.
+        """
+        with self.lock:
+            data = self.load()
+            try:
+                changed = self.apply_record(data, record)
+                if changed:
+                    self._changes += 1
+                    if self._pending is not None:
+                        self._pending.append(record)
+                    else:
+                        self._append([record])
+            except BaseException:
+                # Force a reload so memory can't drift from what is on disk
+                self._data = None
+                raise
+            if changed and self._records >= self.compact_after:
+                self._schedule_compaction()
+            return changed
+
+    @contextmanager
+    def batch(self):
+        """
+        Makes the edits applied in the block durable with one journal write.
+
+        The store lock is held for the whole block. If the block raises, its
+        edits are discarded and the document is reloaded from disk. Nested
+        batches join the outermost one.
+        """
+        with self.lock:
+            if self._pending is not None:
+                yield
+                return
+            self._pending = []
+            try:
+                yield
+            except BaseException:
+                if self._pending:
+                    self._data = None
+                raise
+            finally:
+                pending, self._pending = self._pending, None
+            if pending:
+                try:
+                    self._append(pending)
+                except BaseException:
+                    self._data = None
+                    raise
+                if self._records >= self.compact_after:
+                    self._schedule_compaction()
+
+    @property
+    def version(self):
+        """
+        (reloads, changes) counters for the loaded document.
+
+        The first part changes whenever the document is re-read from disk,
+        i.e. after an edit made outside this object; the second counts the
+        edits applied through it.
+        """
+        self.load()
+        return (self._reloads, self._changes)
+
+    def _append(self, records):
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        if self._records == 0:
+            # Start a fresh journal against the current document
+            header = json.dumps({"digest": self._digest}) + "\n"
+            atomic_write(self.journal_path, (header + lines).encode("utf-8"))
+        else:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            # json.dumps escapes non-ASCII, so characters are bytes
+            _count_bytes("written", self.journal_path, len(lines))
+        self._records += len(records)
+        self._signature = self._current_signature()
+
+    def _schedule_compaction(self):
+        if self._compacting:
+            return
+        self._compacting = True
+        threading.Thread(
+            target=self._compact_in_background,
+            name=f"compact-{self.path.name}",
+            daemon=True,
+        ).start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception:
+            logger.exception(f"compacting {self.path.name} failed")
+        finally:
+            self._compacting = False
+
+    def compact(self, force=False):
+        """Rewrites the document with every journaled edit and empties the journal."""
+        with self.lock:
+            data = self.load()
+            if self._records == 0 and not force:
+                return
+            raw = encode_json(data if self.encode is None else self.encode(data))
+            atomic_write(self.path, raw)
+            if self._pending:
+                # The edits of a batch in progress are part of the document now
+                self._pending.clear()
+            # Any crash before the next write leaves a journal with the old
+            # digest, which load() ignores because the document already has it
+            self._digest = _digest(raw)
+            header = json.dumps({"digest": self._digest}) + "\n"
+            atomic_write(self.journal_path, header.encode("utf-8"))
+            self._records = 0
+            self._signature = self._current_signature()
+            logger.debug(f"compacted {self.path.name}")
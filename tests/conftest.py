@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app's modules live at the top of the repository
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Points storage at an empty data directory."""
+    import storage
+
+    monkeypatch.setattr(storage, "BASE_DIR", tmp_path)
+    storage.invalidate_cache()
+    yield tmp_path
+    storage.invalidate_cache()
@@ -0,0 +1,12 @@
+import io
+import sys
+
+import cli
+
+
+def test_batch_from_stdin_leaves_stdin_open(data_dir, monkeypatch):
+    stdin = io.StringIO("# only a comment\n")
+    monkeypatch.setattr(sys, "stdin", stdin)
+
+    assert cli.command_line(["batch", "-"]) == 0
+    assert not stdin.closed
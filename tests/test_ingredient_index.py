@@ -0,0 +1,36 @@
+import json
+
+from ingredient_index import IngredientIndex, canonical_key, insort_unique
+
+
+def test_canonical_key():
+    assert canonical_key("Bell Peppers (red)") == "bell pepper"
+    assert canonical_key("spring onions") == "green onion"
+    assert canonical_key("asparagus") == "asparagus"
+
+
+def test_sync_follows_the_list_and_indexes_added_names():
+    names = ["bell pepper (red)", "onion"]
+    index = IngredientIndex()
+    index.sync(names)
+    assert index.names is names
+    assert index.display("bell pepper") == "bell pepper"
+
+    insort_unique(names, "Bell Peppers")
+    index.sync(names)
+    index.added(["Bell Peppers"])
+    assert "Bell Peppers" in index
+    assert index.variants("bell pepper") == ["Bell Peppers", "bell pepper (red)"]
+
+
+def test_new_ingredients_are_journaled(data_dir):
+    import json_store
+
+    (data_dir / "ingredients.json").write_text('["onion", "salt"]')
+    json_store.save_ingredients(["garlic", "salt"])
+
+    # Only the new name is journaled; the document isn't rewritten
+    assert json.loads((data_dir / "ingredients.json").read_text()) == ["onion", "salt"]
+    journal = (data_dir / "ingredients.journal").read_text().splitlines()
+    assert [json.loads(line) for line in journal[1:]] == [{"add": "garlic"}]
+    assert json_store.get_all_ingredients() == ["garlic", "onion", "salt"]
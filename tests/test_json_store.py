@@ -0,0 +1,40 @@
+import json
+
+import json_store
+
+
+def load_plan(data_dir):
+    """Loads the saved plan the way a separate reader (e.g. process) would."""
+    manifest = json.loads((data_dir / "meal_plan.json").read_text())
+    return json_store._decode_plan(manifest)[0]
+
+
+def test_old_plan_reads_a_month_replaced_by_later_compactions(data_dir):
+    json_store.update_meal_plan("2026-01-05", "lunch", "soup")
+    json_store.update_meal_plan("2026-02-05", "lunch", "rice")
+    json_store.compact_meal_plan()
+    # Loaded now, January not read yet
+    old_plan = load_plan(data_dir)
+
+    for recipe in ("stew", "salad"):
+        json_store.update_meal_plan("2026-01-06", "dinner", recipe)
+        json_store.compact_meal_plan()
+
+    day = old_plan["2026-01-06"]
+    assert [entry.recipe for entry in day["dinner"]] == ["stew", "salad"]
+    assert [entry.recipe for entry in old_plan["2026-02-05"]["lunch"]] == ["rice"]
+
+
+def test_old_plan_sees_a_deleted_month_as_empty(data_dir):
+    json_store.update_meal_plan("2026-03-01", "lunch", "soup")
+    json_store.update_meal_plan("2026-04-01", "lunch", "soup")
+    json_store.compact_meal_plan()
+    old_plan = load_plan(data_dir)
+
+    json_store.clear_meal_plan("2026-03-01")
+    json_store.compact_meal_plan()
+    json_store.update_meal_plan("2026-04-02", "lunch", "soup")
+    json_store.compact_meal_plan()
+
+    assert "2026-03-01" not in old_plan
+    assert "2026-04-01" in old_plan
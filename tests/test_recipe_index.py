@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from recipe_index import RecipeIndex, _aggregate_numpy, _aggregate_python
+
+pytest.importorskip("numpy")
+
+ITEMS = ["flour", "sugar", "egg", "milk", "butter", "salt", "rice", "onion"]
+UNITS = ["g", "kg", "ml", "cup", "tbsp", "tsp", "pcs", ""]
+
+
+def random_recipes(rng, count):
+    recipes = {}
+    for n in range(count):
+        recipes[f"recipe {n}"] = {
+            "servings": rng.choice([1, 2, 3, 4, 6]),
+            "ingredients": [
+                {
+                    "item": rng.choice(ITEMS),
+                    "unit": rng.choice(UNITS),
+                    "quantity": rng.choice([0.25, 0.5, 1, 1.5, 2, 3, 10, 250]),
+                }
+                for _ in range(rng.randint(0, 8))
+            ],
+        }
+    return recipes
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_numpy_and_python_aggregation_agree(seed):
+    rng = random.Random(seed)
+    index = RecipeIndex()
+    recipes = random_recipes(rng, 40)
+    index.sync(recipes)
+    names = list(recipes) + ["missing recipe"]
+    entries = [
+        (rng.choice(names), rng.choice([None, 0.5, 1, 2, 3.5]))
+        for _ in range(rng.randint(1, 3000))
+    ]
+    scaled = [p for p in (index.scale(*entry) for entry in entries) if p]
+
+    python_counts, numpy_counts = {}, {}
+    python_totals = _aggregate_python(scaled, python_counts)
+    numpy_totals = _aggregate_numpy(scaled, numpy_counts)
+
+    # Same slots in the same order, and bit-identical sums
+    assert list(numpy_totals.items()) == list(python_totals.items())
+    assert numpy_counts == python_counts
+
+
+def test_numpy_aggregation_of_empty_recipes():
+    index = RecipeIndex()
+    index.sync({"water": {"servings": 1, "ingredients": []}})
+    assert _aggregate_numpy([index.scale("water", 2)]) == {}
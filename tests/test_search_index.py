@@ -0,0 +1,61 @@
+import random
+from difflib import get_close_matches
+
+import pytest
+
+from search_index import RecipeSearchIndex
+
+# A small alphabet makes shared characters, equal ratios and ties common
+ALPHABET = "aabcdeeilnorst "
+
+
+def random_name(rng):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 14))).strip()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_search_matches_get_close_matches(seed):
+    rng = random.Random(seed)
+    names = {random_name(rng) for _ in range(rng.randint(0, 300))} - {""}
+    index = RecipeSearchIndex(names)
+
+    for _ in range(50):
+        word = random_name(rng) if rng.random() < 0.8 else rng.choice([*names, ""])
+        n = rng.randint(1, 12)
+        cutoff = rng.choice([0.0, 0.1, 0.3, 0.4, 0.5, 0.6, 0.75, 0.9, 1.0])
+        assert index.search(word, n, cutoff) == get_close_matches(
+            word, names, n, cutoff
+        )
+
+
+def test_search_follows_added_and_discarded_names():
+    rng = random.Random(1)
+    names = {random_name(rng) for _ in range(200)} - {""}
+    index = RecipeSearchIndex(names)
+    for name in rng.sample(sorted(names), 50):
+        index.discard(name)
+        names.discard(name)
+    for _ in range(50):
+        name = random_name(rng)
+        if name:
+            index.add(name)
+            names.add(name)
+
+    for _ in range(100):
+        word = random_name(rng)
+        assert index.search(word, 5, 0.4) == get_close_matches(word, names, 5, 0.4)
+
+
+def test_search_rejects_bad_arguments():
+    index = RecipeSearchIndex(["rice"])
+    with pytest.raises(ValueError):
+        index.search("rice", n=0)
+    with pytest.raises(ValueError):
+        index.search("rice", cutoff=1.5)
+
+
+def test_containing():
+    index = RecipeSearchIndex(["Fried Rice", "rice cake", "Beef Pares", "ri"])
+    assert index.containing("RIC") == ["Fried Rice", "rice cake"]
+    assert index.containing("ri") == ["Fried Rice", "ri", "rice cake"]
+    assert index.containing("xyz") == []
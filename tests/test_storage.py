@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from storage import JournaledFile
+
+
+def set_key(data, record):
+    """apply_record for a flat {key: value} document."""
+    if data.get(record["key"]) == record["value"]:
+        return False
+    data[record["key"]] = record["value"]
+    return True
+
+
+def journaled(compact_after=200):
+    return JournaledFile("doc.json", set_key, compact_after=compact_after)
+
+
+def journal_lines(data_dir):
+    return (data_dir / "doc.journal").read_text(encoding="utf-8").splitlines()
+
+
+def test_edits_are_replayed_from_the_journal(data_dir):
+    doc = journaled()
+    assert doc.apply({"key": "a", "value": 1})
+    assert doc.apply({"key": "b", "value": 2})
+    assert not doc.apply({"key": "b", "value": 2})
+
+    assert not (data_dir / "doc.json").exists()
+    assert len(journal_lines(data_dir)) == 3  # header and two records
+    assert journaled().load() == {"a": 1, "b": 2}
+
+
+def test_batch_writes_once_and_discards_on_error(data_dir):
+    doc = journaled()
+    with doc.batch():
+        doc.apply({"key": "a", "value": 1})
+        doc.apply({"key": "b", "value": 2})
+    assert len(journal_lines(data_dir)) == 3
+
+    with pytest.raises(RuntimeError):
+        with doc.batch():
+            doc.apply({"key": "c", "value": 3})
+            raise RuntimeError
+    assert doc.load() == {"a": 1, "b": 2}
+    assert journaled().load() == {"a": 1, "b": 2}
+
+
+def test_truncated_record_is_dropped_and_compacted(data_dir):
+    doc = journaled()
+    doc.apply({"key": "a", "value": 1})
+    doc.apply({"key": "b", "value": 2})
+    with open(data_dir / "doc.journal", "a", encoding="utf-8") as f:
+        f.write('{"key": "c", "val')  # a crash mid-append
+
+    assert journaled().load() == {"a": 1, "b": 2}
+    # The intact records were folded into the document
+    assert json.loads((data_dir / "doc.json").read_text()) == {"a": 1, "b": 2}
+    assert len(journal_lines(data_dir)) == 1
+
+    doc = journaled()
+    doc.apply({"key": "c", "value": 3})
+    assert journaled().load() == {"a": 1, "b": 2, "c": 3}
+
+
+def test_stale_journal_is_ignored(data_dir):
+    doc = journaled()
+    doc.apply({"key": "a", "value": 1})
+    # A manual edit of the document makes the journal's digest stale
+    (data_dir / "doc.json").write_text('{"z": 0}')
+
+    assert journaled().load() == {"z": 0}
+
+
+def test_compact_folds_the_journal_into_the_document(data_dir):
+    doc = journaled()
+    for value in range(5):
+        doc.apply({"key": "n", "value": value})
+    doc.compact()
+
+    assert json.loads((data_dir / "doc.json").read_text()) == {"n": 4}
+    assert len(journal_lines(data_dir)) == 1
+    doc.apply({"key": "m", "value": 1})
+    assert journaled().load() == {"n": 4, "m": 1}
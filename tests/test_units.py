@@ -0,0 +1,100 @@
+import pytest
+
+from recipe_index import RecipeIndex
+from units import canonical_unit, normalize, unit_size
+
+
+@pytest.mark.parametrize(
+    "unit, expected",
+    [
+        ("Tablespoons", ("ml", 15.0)),
+        ("tbs", ("ml", 15.0)),
+        ("  Fluid   Ounces ", ("ml", 30.0)),
+        ("kilos", ("g", 1000.0)),
+        ("piece", ("pcs", 1.0)),
+        ("Cloves", ("clove", 1.0)),
+        ("thumb-sized", ("thumb-sized", 1.0)),
+        ("", ("", 1.0)),
+    ],
+)
+def test_normalize(unit, expected):
+    assert normalize(unit) == expected
+
+
+def test_canonical_unit_and_size():
+    assert canonical_unit("Teaspoons") == "tsp"
+    assert canonical_unit("Cloves") == "cloves"
+    assert unit_size("cup") == 240.0
+    assert unit_size("cloves") == 1.0
+
+
+def ingredient(item, quantity, unit):
+    return {"item": item, "quantity": quantity, "unit": unit}
+
+
+def shopping_list(recipes, entries):
+    index = RecipeIndex()
+    index.sync(recipes)
+    return index.to_shopping_list(index.aggregate(entries))
+
+
+def test_units_of_one_dimension_collapse_into_one_line():
+    recipes = {
+        "a": {"servings": 1, "ingredients": [ingredient("milk", 1, "tbsp")]},
+        "b": {"servings": 1, "ingredients": [ingredient("Milk", 2, "Tablespoons")]},
+        "c": {"servings": 1, "ingredients": [ingredient("milk", 15, "ml")]},
+    }
+    totals = shopping_list(recipes, [("a", None), ("b", None), ("c", None)])
+    # Listed in the unit most recipes use
+    assert totals == {"milk": {"tbsp": pytest.approx(4.0)}}
+
+
+def test_totals_are_listed_in_the_recipes_unit():
+    recipes = {
+        "bread": {
+            "servings": 2,
+            "ingredients": [
+                ingredient("baking soda", 1, "tsp"),
+                ingredient("brown sugar", 0.125, "cup"),
+                ingredient("garlic", 2, "cloves"),
+                ingredient("garlic", 1, "clove"),
+                ingredient("flour", 0.5, "kg"),
+            ],
+        }
+    }
+    totals = shopping_list(recipes, [("bread", 4)])
+    assert totals == {
+        "baking soda": {"tsp": 2.0},
+        "brown sugar": {"cup": 0.25},
+        "garlic": {"cloves": 6.0},
+        "flour": {"kg": 1.0},
+    }
+
+
+def test_different_dimensions_stay_apart():
+    recipes = {
+        "a": {
+            "servings": 1,
+            "ingredients": [
+                ingredient("butter", 100, "g"),
+                ingredient("butter", 2, "tbsp"),
+                ingredient("butter", 1, "knob"),
+            ],
+        }
+    }
+    totals = shopping_list(recipes, [("a", None)])
+    assert totals == {"butter": {"g": 100.0, "tbsp": 2.0, "knob": 1.0}}
+
+
+def test_discarded_recipes_no_longer_pick_the_unit():
+    recipes = {
+        "a": {"servings": 1, "ingredients": [ingredient("oil", 1, "cup")]},
+        "b": {"servings": 1, "ingredients": [ingredient("oil", 30, "ml")]},
+    }
+    index = RecipeIndex()
+    index.sync(recipes)
+    index.aggregate([("a", None)])
+    recipes["a"]["ingredients"] = [ingredient("oil", 1, "tsp")]
+    index.discard("a")
+    totals = index.to_shopping_list(index.aggregate([("a", None), ("b", None)]))
+    assert totals == {"oil": {"tsp": 7.0}}
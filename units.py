@@ -0,0 +1,111 @@
+"""
+Unit registry for ingredient quantities.
+Maps the many spellings of a unit ("tbsp", "tablespoons", "Tbs") to one
+canonical unit and converts units of the same dimension (mass, volume, count)
+to a shared base unit, so the shopping list can add them together.
+
+The conversion table is precomputed at import; RecipeIndex applies it once
+when a recipe is compiled, and converts the totals back to the unit the
+recipes use (unit_size) when it lists them.
+"""
+
+# Base unit each dimension is aggregated in
+BASE_UNITS = {"mass": "g", "volume": "ml", "count": "pcs"}
+
+# canonical unit: (dimension, size in the dimension's base unit, aliases)
+# Kitchen volumes use the usual metric measures.
+UNITS = {
+    "g": ("mass", 1.0, ["gram", "grams", "gr", "grs"]),
+    "kg": ("mass", 1000.0, ["kgs", "kilo", "kilos", "kilogram", "kilograms"]),
+    "mg": ("mass", 0.001, ["milligram", "milligrams"]),
+    "oz": ("mass", 28.349523125, ["ounce", "ounces"]),
+    "lb": ("mass", 453.59237, ["lbs", "pound", "pounds"]),
+    "ml": (
+        "volume",
+        1.0,
+        ["mls", "milliliter", "milliliters", "millilitre", "millilitres"],
+    ),
+    "l": ("volume", 1000.0, ["liter", "liters", "litre", "litres", "ltr"]),
+    "tsp": ("volume", 5.0, ["tsps", "teaspoon", "teaspoons"]),
+    "tbsp": ("volume", 15.0, ["tbsps", "tbs", "tbl", "tablespoon", "tablespoons"]),
+    "cup": ("volume", 240.0, ["cups"]),
+    "fl oz": ("volume", 30.0, ["floz", "fluid ounce", "fluid ounces"]),
+    "pcs": ("count", 1.0, ["pc", "piece", "pieces", "whole", "each", "ea"]),
+}
+
+# Counted units that can't be converted to pieces, only merged with their
+# plural spellings
+COUNTED_UNITS = {
+    "clove": ["cloves"],
+    "stalk": ["stalks"],
+    "sprig": ["sprigs"],
+    "head": ["heads"],
+    "leaf": ["leaves"],
+    "pinch": ["pinches"],
+    "packet": ["packets"],
+    "slice": ["slices"],
+    "can": ["cans"],
+    "bunch": ["bunches"],
+}
+
+
+def _build_table():
+    """Builds the {spelling: (aggregation unit, factor)} lookup table."""
+    table = {}
+    for unit, (dimension, factor, aliases) in UNITS.items():
+        base = BASE_UNITS[dimension]
+        for spelling in [unit, *aliases]:
+            table[spelling] = (base, factor)
+    for unit, aliases in COUNTED_UNITS.items():
+        for spelling in [unit, *aliases]:
+            table[spelling] = (unit, 1.0)
+    return table
+
+
+CONVERSIONS = _build_table()
+
+# {spelling: canonical unit} for the convertible units
+SPELLINGS = {
+    spelling: unit
+    for unit, (_, _, aliases) in UNITS.items()
+    for spelling in [unit, *aliases]
+}
+
+
+def normalize(unit):
+    """
+    Returns the unit a quantity is aggregated in, and the factor to get there.
+
+    Unknown units are kept as they are (lowercased), with a factor of 1.
+
+    Example:
+        normalize("Tablespoons") -> ("ml", 15.0)
+    """
+    key = " ".join(unit.lower().split())
+    return CONVERSIONS.get(key, (key, 1.0))
+
+
+def unit_size(unit):
+    """
+    Returns the size of a canonical unit in its dimension's base unit.
+
+    Counted and unknown units have a size of 1.
+
+    Example:
+        unit_size("tbsp") -> 15.0
+    """
+    entry = UNITS.get(unit)
+    return 1.0 if entry is None else entry[1]
+
+
+def canonical_unit(unit):
+    """
+    Returns the standard spelling of a unit.
+
+    Counted and unknown units are only lowercased, so "Cloves" stays "cloves".
+
+    Example:
+        canonical_unit("Tablespoons") -> "tbsp"
+    """
+    key = " ".join(unit.lower().split())
+    return SPELLINGS.get(key, key)